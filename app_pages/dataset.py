@@ -0,0 +1,328 @@
+import threading
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from utils.aggregate_cube import build_cube
+from utils.date_index import DateIndex
+from utils.partitioned_store import prunes_partitions
+from utils.parquet_query import column_names, column_range, filter_frame, read_subset
+from utils.population_join import POPULATION_COLUMNS
+from utils.site_index import SITE_KEYS, build_site_index
+from utils.state_geometry import (
+    DEFAULT_SHAPEFILE_PATH,
+    label_points,
+    load_geojson,
+    outline_coordinates,
+)
+from utils import state_year
+
+# Pages read data through query()/memoize_query() (column and row subsets,
+# from Parquet when it exists) and memoize() (results derived from the
+# loaded dataset once per process, such as the cube and the date index).
+# Frames handed out share memory with the loaded dataset; with copy-on-write
+# (enabled once at startup in dashboard_app.py) a page that modifies one
+# only copies the columns it touches, and the shared dataset is never
+# mutated.
+
+# Enriched data that query() reads subsets of: the year/State partitioned
+# dataset for queries filtered by year or state, the single file otherwise
+# (or whichever exists). Without either, query() selects from the fully
+# loaded dataset instead.
+DATASET_PATH = Path('data/cleaned_enriched')
+PARQUET_PATH = Path('data/cleaned_enriched.parquet')
+
+
+# Sessions and the background threads share the memo dicts below. Finished
+# results are read without locking; a missing one is built under a lock of
+# its own key, so each is computed once without holding up other builds or
+# reads (builds may memoize their own inputs, e.g. get_cube()). _memo_lock
+# only guards the table of those locks and the reset in _memo().
+_memo_lock = threading.Lock()
+_build_locks = {}
+
+
+def _once(values: dict, key, build):
+    try:
+        return values[key]
+    except KeyError:
+        pass
+    lock_key = (id(values), key)
+    with _memo_lock:
+        lock = _build_locks.setdefault(lock_key, threading.Lock())
+    try:
+        with lock:
+            if key not in values:
+                values[key] = build()
+            return values[key]
+    finally:
+        with _memo_lock:
+            if _build_locks.get(lock_key) is lock:
+                del _build_locks[lock_key]
+
+
+@st.cache_resource
+def _shared_memo() -> dict:
+    return {}
+
+
+def _memo() -> dict:
+    # The loaded frame is shared by all sessions (load_data is a resource
+    # cache), so derived results are shared process-wide too. They are tied
+    # to that frame and dropped if it is replaced.
+    df = st.session_state.loaded_data
+    memo = _shared_memo()
+    if memo.get('source') is not df:
+        with _memo_lock:
+            if memo.get('source') is not df:
+                memo['values'] = {}
+                memo['source'] = df
+    return memo['values']
+
+
+# Results built on the loading thread as soon as the dataset is loaded, as
+# futures of (dataset, result); memoize() takes them from there.
+_prebuilt = {}
+_CUBE_KEY = ('cube',)
+
+
+def memoize(key, build):
+    """
+    Return ``build(df)`` for the loaded dataset, computing it at most once.
+    ``key`` must identify the result (e.g. a tuple of the page parameters).
+    """
+    df = st.session_state.loaded_data
+
+    def run():
+        future = _prebuilt.get(key)
+        if future is not None:
+            source, value = future.result()
+            if source is df:
+                return value
+        return build(df)
+
+    return _once(_memo(), key, run)
+
+
+def prebuild_cube(executor, frame) -> None:
+    """
+    Queue the cube build on ``executor`` behind ``frame`` (the future of the
+    dataset load), so no session request pays for it; get_cube() waits for
+    it rather than building it again.
+    """
+    def build():
+        df = frame.result()
+        return df, (None if df is None else build_cube(df))
+
+    _prebuilt[_CUBE_KEY] = executor.submit(build)
+
+
+def get_cube() -> dict:
+    """Aggregate cube of the loaded dataset (see utils.aggregate_cube)."""
+    return memoize(_CUBE_KEY, build_cube)
+
+
+def date_index() -> DateIndex:
+    """
+    Date index over the loaded dataset, whose row positions it refers to;
+    query() uses it for date ranges when there is no Parquet file.
+    """
+    return memoize(('date_index',), lambda df: DateIndex(df['Date Local']))
+
+
+def get_site_index() -> pd.DataFrame:
+    """One row per monitoring site (see utils.site_index)."""
+    wanted = [*SITE_KEYS, 'Date Local', 'lat_city', 'lon_city', *POPULATION_COLUMNS]
+    available = set(available_columns())
+    columns = [c for c in wanted if c in available]
+    return memoize_query(('site_index',), columns, build_site_index)
+
+
+_loader = None
+
+
+def set_loader(loader) -> None:
+    """Function returning the full dataset, used when there is no Parquet file."""
+    global _loader
+    _loader = loader
+
+
+def _loaded_data() -> pd.DataFrame:
+    if 'loaded_data' not in st.session_state:
+        st.session_state.loaded_data = _loader()
+    return st.session_state.loaded_data
+
+
+def _parquet_source(filters=()):
+    # (path, mtime) as cache key, so a rebuilt file is not served from the
+    # cache
+    paths = (DATASET_PATH, PARQUET_PATH)
+    if not prunes_partitions(filters):
+        paths = paths[::-1]
+    for path in paths:
+        try:
+            return str(path), path.stat().st_mtime_ns
+        except OSError:
+            continue
+    return None
+
+
+def _freeze(filters):
+    return tuple(
+        (col, op, tuple(value) if op in ('in', 'not in') else value)
+        for col, op, value in filters or ()
+    )
+
+
+def query(columns, filters=None) -> pd.DataFrame:
+    """
+    ``columns`` of the rows matching ``filters`` (see utils.parquet_query),
+    read from the enriched Parquet file with column pruning and row-group
+    pushdown, so cost scales with the query rather than the file. Rows are
+    not cached; cache what is built from them instead (cached_query()).
+    """
+    return _fetch(columns, filters)
+
+
+def _fetch(columns, filters):
+    columns = tuple(dict.fromkeys(columns))
+    filters = _freeze(filters)
+    source = _parquet_source(filters)
+    if source is None:
+        df = _loaded_data()
+        # Date and year ranges are sliced off the date-sorted frame
+        index = None
+        if 'Date Local' in df.columns and any(
+            f[0] in ('Date Local', 'year') for f in filters
+        ):
+            index = date_index()
+        return filter_frame(df, columns, filters, date_index=index)
+    return read_subset(source[0], columns, filters)
+
+
+def _source_key():
+    return _parquet_source() or ('loaded', id(_loaded_data()))
+
+
+def cached_query(key, columns, build, filters=None):
+    """
+    ``build(query(columns, filters))``, shared between sessions, for
+    results that depend on user input such as a date window. Unlike
+    memoize_query() only the most recent results are kept, for at most an
+    hour, and never the rows they were built from.
+    """
+    return _cached_query(
+        _source_key(), key, tuple(columns), _freeze(filters), build
+    )
+
+
+@st.cache_resource(max_entries=16, ttl=3600, show_spinner=False)
+def _cached_query(source, key, columns, filters, _build):
+    # source (path, mtime) is only part of the cache key; _build is not
+    # hashed, key identifies it
+    return _build(_fetch(columns, filters))
+
+
+@st.cache_resource
+def _query_memo() -> dict:
+    return {}
+
+
+def memoize_query(key, columns, build, filters=None):
+    """
+    ``build(query(columns, filters))`` computed at most once per data file,
+    like memoize() but without loading the full dataset.
+    """
+    full_key = (_source_key(), key, tuple(columns), _freeze(filters))
+    # Only the result is kept, not the rows it was built from
+    return _once(_query_memo(), full_key, lambda: build(_fetch(columns, filters)))
+
+
+def available_columns() -> list:
+    """Columns query() can return."""
+    source = _parquet_source()
+    if source is None:
+        return list(_loaded_data().columns)
+    return list(_schema_names(*source))
+
+
+@st.cache_resource(show_spinner=False)
+def _schema_names(path, mtime_ns):
+    return tuple(column_names(path))
+
+
+def value_range(column):
+    """(min, max) of a column, from file statistics when possible."""
+    source = _parquet_source()
+    if source is None:
+        s = _loaded_data()[column]
+        return s.min(), s.max()
+    return _value_range(source[0], source[1], column)
+
+
+@st.cache_resource(show_spinner=False)
+def _value_range(path, mtime_ns, column):
+    return column_range(path, column)
+
+
+def _shapefile_key():
+    path = DEFAULT_SHAPEFILE_PATH
+    try:
+        return str(path), path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def state_geojson(level='low'):
+    """
+    Simplified state outlines (see utils.state_geometry), read once per
+    process; None without the shapefile.
+    """
+    key = _shapefile_key()
+    return None if key is None else _state_geojson(level, *key)
+
+
+def state_outlines(level='low') -> tuple:
+    """(lons, lats) of the state borders at ``level`` for a line trace."""
+    key = _shapefile_key()
+    return ([], []) if key is None else _state_outlines(level, *key)
+
+
+def state_points(level='low') -> dict:
+    """{state: (lon, lat)} to place markers at (see label_points)."""
+    key = _shapefile_key()
+    return {} if key is None else _state_points(level, *key)
+
+
+@st.cache_resource(show_spinner=False)
+def _state_geojson(level, path, mtime_ns):
+    return load_geojson(level, shapefile_path=path)
+
+
+@st.cache_resource(show_spinner=False)
+def _state_outlines(level, path, mtime_ns):
+    return outline_coordinates(_state_geojson(level, path, mtime_ns))
+
+
+@st.cache_resource(show_spinner=False)
+def _state_points(level, path, mtime_ns):
+    return label_points(_state_geojson(level, path, mtime_ns))
+
+
+def state_population():
+    """
+    Population per (State, year) from the bundled state file (see
+    utils.state_year), read once per process; None without the file.
+    """
+    path = state_year.DEFAULT_POP_STATE_PATH
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    return _state_population(str(path), mtime_ns)
+
+
+@st.cache_resource(show_spinner=False)
+def _state_population(path, mtime_ns):
+    return state_year.state_population(path)
@@ -1,29 +1,38 @@
+import json
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+from app_pages.dataset import get_cube, memoize
+from utils.aggregate_cube import rollup
+from utils.event_impact import DEFAULT_EVENTS_PATH, event_impact, load_events
+from utils.profiling import plotly_chart
+
+
+@st.cache_data(show_spinner=False)
+def _load_events(path, mtime_ns):
+    # mtime_ns is only part of the cache key, so edits to the file show up
+    return load_events(path)
+
+
+def _events():
+    try:
+        mtime_ns = DEFAULT_EVENTS_PATH.stat().st_mtime_ns
+    except OSError:
+        return {}
+    return _load_events(str(DEFAULT_EVENTS_PATH), mtime_ns)
+
+
+def _impact(event):
+    # Computed once per event definition and shared by all sessions
+    key = ('event_impact', json.dumps(event, default=str, sort_keys=True))
+    return memoize(key, lambda df: event_impact(get_cube(), event))
+
 
 def event_impact_body():
-    df = st.session_state.loaded_data.copy()
-    df['Date Local'] = pd.to_datetime(df['Date Local'])
-    df['year'] = df['Date Local'].dt.year
-    pollutants = [c for c in df.columns if c.endswith(' AQI') or c.endswith(' Mean')]
+    state_year = get_cube()['state_year']
+    pollutants = list(state_year['sum'].columns)
 
-    EVENTS = {
-        'Hurricane Sandy (2012, NY/NJ)': {
-            'states': ['New York', 'New Jersey'],
-            'year_range': (2010, 2014),
-            'event_year': 2012,
-            'color': 'red',
-            'label': 'Hurricane Sandy'
-        },
-        'Clean Power Plan (2015, WV/OH/KY)': {
-            'states': ['West Virginia', 'Ohio', 'Kentucky'],
-            'year_range': (2012, 2016),
-            'event_year': 2015,
-            'color': 'blue',
-            'label': 'Clean Power Plan'
-        }
-    }
+    # Events are listed in data/processed/events.json
+    EVENTS = _events()
 
     st.title('Event Impact on US Pollution')
     st.header('Hypothesis')
@@ -35,35 +44,46 @@ def event_impact_body():
     chart_choice = st.selectbox('Choose chart to display:', chart_options, index=0)
 
     if chart_choice == 'US Yearly Pollutant Trends (Default)':
+        yearly = memoize(('event_impact', 'us_yearly'), lambda df: rollup(state_year, 'year', pollutants))
         fig = px.line()
         for pollutant in pollutants:
-            yearly = df.groupby('year')[pollutant].mean()
-            fig.add_scatter(x=yearly.index, y=yearly.values, mode='lines', name=pollutant)
+            fig.add_scatter(x=yearly.index, y=yearly[pollutant].values, mode='lines', name=pollutant)
         fig.update_layout(title='Yearly Pollutant Trends (Event Impact)', xaxis_title='Year', yaxis_title='Mean Pollutant Value')
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
         st.markdown('---')
         st.header('Findings & Conclusion')
         st.write('This chart shows overall yearly pollutant trends for the US. Select an event for focused analysis and findings.')
     else:
         event = EVENTS[chart_choice]
-        states = event['states']
-        year_min, year_max = event['year_range']
-        event_year = event['event_year']
+        event_year = event['event_date'].year
         color = event['color']
         label = event['label']
-        dff = df[df['State'].isin(states) & (df['year'] >= year_min) & (df['year'] <= year_max)]
+        impact = _impact(event)
+        yearly = impact['yearly']
         fig = px.line()
         for pollutant in pollutants:
-            yearly = dff.groupby('year')[pollutant].mean()
-            fig.add_scatter(x=yearly.index, y=yearly.values, mode='lines', name=pollutant)
+            fig.add_scatter(x=yearly.index, y=yearly[pollutant].values, mode='lines', name=pollutant)
         fig.add_vline(x=event_year, line_dash='dash', line_color=color)
-        fig.add_annotation(x=event_year+0.1, y=max([dff.groupby('year')[p].mean().max() for p in pollutants]),
+        fig.add_annotation(x=event_year+0.1, y=yearly.max().max(),
                             text=label, showarrow=False, font=dict(color=color), yanchor='top', textangle=-90)
         fig.update_layout(title=f"Pollutant Trends: {label}", xaxis_title='Year', yaxis_title='Mean Pollutant Value')
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
+
+        st.subheader('Before and after the event')
+        st.write(
+            f"Mean values in the {event['pre_months']} months before and the "
+            f"{event['post_months']} months from {event['event_date']:%B %Y}, in "
+            f"{', '.join(event['states'])} and in the rest of the US. "
+            "The difference in differences (DiD) is the change in the event "
+            "states minus the change elsewhere."
+        )
+        st.dataframe(
+            impact['summary'].rename(columns={
+                'pre': 'Before', 'post': 'After', 'delta': 'Change',
+                'control_pre': 'Rest of US before', 'control_post': 'Rest of US after',
+                'control_delta': 'Rest of US change', 'did': 'DiD',
+            }).style.format('{:.3f}'),
+        )
         st.markdown('---')
         st.header('Findings & Conclusion')
-        if chart_choice.startswith('Hurricane Sandy'):
-            st.write('In 2012 (Hurricane Sandy), O3 AQI, NO2 AQI, and NO2 Mean show an increase from 2011 to 2012, followed by a decline in 2013. This pattern suggests a possible event-driven impact and subsequent recovery.')
-        else:
-            st.write('In 2015 (Clean Power Plan), the effect appears delayed, with pollutant levels showing more noticeable changes in 2016 rather than immediately in 2015.')
+        st.write(event['findings'])
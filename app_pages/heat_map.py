@@ -1,9 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+from app_pages.dataset import available_columns, cached_query, state_outlines, value_range
+from utils.spatial_binning import STATISTICS, grid_bin
+from utils.state_geometry import level_for_zoom
+from utils.profiling import plotly_chart, span
 
 
-def _find_lat_lon_columns(df: pd.DataFrame):
+def _find_lat_lon_columns(columns):
     lat_candidates = [
         "Latitude",
         "latitude",
@@ -18,19 +23,20 @@ def _find_lat_lon_columns(df: pd.DataFrame):
         "Lon",
         "lon_city",
     ]
-    lat_col = next((c for c in lat_candidates if c in df.columns), None)
-    lon_col = next((c for c in lon_candidates if c in df.columns), None)
+    lat_col = next((c for c in lat_candidates if c in columns), None)
+    lon_col = next((c for c in lon_candidates if c in columns), None)
     return lat_col, lon_col
 
 
 def heat_map_body():
     st.write("# Pollution Heat Map")
 
-    df = st.session_state.loaded_data
+    # Only the columns and dates selected below are read (see query())
+    columns = available_columns()
 
     # Select pollutant column from available AQI/Mean columns
     pollutant_cols = [
-        c for c in df.columns if c.endswith(" AQI") or c.endswith(" Mean")
+        c for c in columns if c.endswith(" AQI") or c.endswith(" Mean")
     ]
     pollutant_cols = sorted(pollutant_cols)
     if not pollutant_cols:
@@ -45,7 +51,7 @@ def heat_map_body():
         help="Choose an AQI or Mean column",
     )
 
-    lat_col, lon_col = _find_lat_lon_columns(df)
+    lat_col, lon_col = _find_lat_lon_columns(columns)
     if not lat_col or not lon_col:
         msg = (
             "No latitude/longitude columns found. Expected 'Latitude'/'Longitude' "
@@ -55,11 +61,11 @@ def heat_map_body():
         return
 
     # Optional date filter; default last 365 days to reduce load
-    date_col = "Date Local" if "Date Local" in df.columns else None
+    date_col = "Date Local" if "Date Local" in columns else None
+    filters = []
     if date_col is not None:
         try:
-            dmin = pd.to_datetime(df[date_col]).min()
-            dmax = pd.to_datetime(df[date_col]).max()
+            dmin, dmax = (pd.Timestamp(d) for d in value_range(date_col))
             default_start = max(dmin, dmax - pd.Timedelta(days=365)).date()
             default_end = dmax.date()
             with st.expander("Time filter"):
@@ -69,18 +75,9 @@ def heat_map_body():
                     min_value=dmin.date(),
                     max_value=dmax.date(),
                 )
-            mask = (
-                (pd.to_datetime(df[date_col]).dt.date >= start)
-                & (pd.to_datetime(df[date_col]).dt.date <= end)
-            )
-            dfx = df.loc[mask].copy()
+            filters = [(date_col, '>=', start), (date_col, '<=', end)]
         except Exception:
-            dfx = df.copy()
-    else:
-        dfx = df.copy()
-
-    # Drop rows missing lat/lon/value
-    dfx = dfx.dropna(subset=[lat_col, lon_col, selected]).copy()
+            filters = []
 
     # Controls
     nbins = st.slider(
@@ -92,24 +89,11 @@ def heat_map_body():
     )
     agg = st.selectbox(
         "Aggregation",
-        options=["mean", "median", "max"],
+        options=list(STATISTICS),
         help="How to aggregate within each spatial bin",
     )
     opacity = st.slider("Opacity", 0.1, 1.0, 0.85, 0.05)
 
-    limit_rows = st.checkbox(
-        "Limit rows (sampling)",
-        value=True,
-        help="Sample rows to speed up rendering",
-    )
-    max_rows = st.number_input(
-        "Max rows when sampling",
-        min_value=10000,
-        max_value=300000,
-        value=100000,
-        step=10000,
-    )
-
     # Defer heavy render until user clicks
     render = st.button("Render heat map")
 
@@ -117,32 +101,42 @@ def heat_map_body():
         st.info("Adjust settings, then click 'Render heat map' to draw.")
         return
 
-    # Optionally sample to cap rows
-    if limit_rows and len(dfx) > max_rows:
-        dfx = dfx.sample(n=max_rows, random_state=42)
-
-    # Build density heatmap on a real map using Mapbox
-    histfunc = {"mean": "avg", "median": "median", "max": "max"}[agg]
-    mapbox_token = st.secrets["mapbox_token"] if "mapbox_token" in st.secrets else None
-    if not mapbox_token:
-        st.warning("No Mapbox token found in Streamlit secrets. Please add one for map backgrounds.")
-    px.set_mapbox_access_token(mapbox_token)
-    fig = px.density_mapbox(
-        dfx,
-        lat=lat_col,
-        lon=lon_col,
-        z=selected,
-        radius=10,
-        center={"lat": 39.5, "lon": -98.35},  # Center on US
-        zoom=3.2,
-        mapbox_style="carto-positron",
-        color_continuous_scale="Turbo",
-        labels={lon_col: "Longitude", lat_col: "Latitude", selected: selected},
-        opacity=opacity
-    )
-    fig.update_layout(
-        height=650,
-        margin=dict(l=0, r=0, t=30, b=0),
-        title=f"Heat map of {selected}",
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    # Read only the selected column and date range, then aggregate every
+    # row into nbins x nbins cells; only the populated cells are sent to
+    # the browser. Only the cells are cached, not the rows.
+    with span('data prep') as record:
+        cells = cached_query(
+            ('heat_map', nbins, agg),
+            [lat_col, lon_col, selected],
+            lambda df: grid_bin(df[lat_col], df[lon_col], df[selected], nbins, agg),
+            filters,
+        )
+        record['rows'] = int(cells['count'].sum())
+
+    # Draw the cells over the bundled state outlines, so no map tiles (or
+    # Mapbox token) are needed
+    lons, lats = state_outlines(level_for_zoom(3.2))
+    with span('figure', cells=len(cells)):
+        fig = px.scatter_geo(
+            cells,
+            lat="lat",
+            lon="lon",
+            color="value",
+            hover_data={"count": True},
+            color_continuous_scale="Turbo",
+            labels={"lon": "Longitude", "lat": "Latitude", "value": f"{selected} ({agg})", "count": "Rows"},
+            opacity=opacity,
+        )
+        fig.update_traces(marker=dict(symbol="square", size=max(2, 600 // nbins), line_width=0))
+        fig.add_trace(go.Scattergeo(
+            lon=lons, lat=lats, mode="lines",
+            line=dict(width=0.6, color="#555"),
+            hoverinfo="skip", showlegend=False,
+        ))
+        fig.update_geos(scope="usa", visible=False)
+        fig.update_layout(
+            height=650,
+            margin=dict(l=0, r=0, t=30, b=0),
+            title=f"Heat map of {selected}",
+        )
+    plotly_chart(fig, use_container_width=True)
@@ -1,6 +1,10 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+from app_pages.dataset import get_site_index, state_outlines
+from utils.population_join import POPULATION_COLUMNS
+from utils.state_geometry import level_for_zoom
+from utils.profiling import plotly_chart
 
 def measurement_coverage_body():
     st.title('Measurement Coverage Bias')
@@ -9,20 +13,58 @@ def measurement_coverage_body():
     st.write('This page visualizes the locations of monitoring sites and their associated city populations to assess coverage bias.')
     st.markdown('---')
 
-    df = st.session_state.loaded_data.copy()
-    plot_df = df.dropna(subset=['lat_city', 'lon_city', 'population_city'])
-    plot_df = plot_df[plot_df['population_city'] > 0]
-    fig = px.scatter_mapbox(
-        plot_df,
+    # One point per monitoring site rather than one per daily measurement
+    sites = get_site_index()
+    if not {'lat_city', 'lon_city'} <= set(sites.columns):
+        st.warning('City coordinates not found; the city centroid enrichment is needed to map monitoring sites.')
+        return
+    plot_df = sites.dropna(subset=['lat_city', 'lon_city'])
+    # Finest population available: city, then county, then state
+    pop_col = next(
+        (c for c in POPULATION_COLUMNS if c in plot_df.columns and plot_df[c].gt(0).any()),
+        None,
+    )
+    if pop_col is None:
+        st.info('No population data found; sites are drawn without population.')
+        sized, unsized = plot_df, plot_df.iloc[:0]
+    else:
+        # Population files are partial: sites without one are still drawn,
+        # at a fixed size in grey
+        known = plot_df[pop_col] > 0
+        sized, unsized = plot_df[known], plot_df[~known]
+        if pop_col != 'population_city':
+            st.caption(f'City populations not found; markers are sized by {pop_col.replace("_", " ")}.')
+    hover = {
+        c: True for c in ['State', 'County', 'City', 'Address', 'n_obs', 'first_obs', 'last_obs']
+        if c in plot_df.columns
+    }
+    labels = {'n_obs': 'Days measured', 'first_obs': 'First measured', 'last_obs': 'Last measured'}
+    fig = px.scatter_geo(
+        sized,
         lat='lat_city',
         lon='lon_city',
-        color='population_city',
-        size='population_city',
-        mapbox_style='carto-positron',
-        zoom=3,
+        color=pop_col,
+        size=pop_col,
+        hover_data=hover,
+        labels=labels,
         title='Monitoring Site Coverage'
     )
-    st.plotly_chart(fig, use_container_width=True)
+    if len(unsized):
+        rest = px.scatter_geo(unsized, lat='lat_city', lon='lon_city', hover_data=hover, labels=labels)
+        rest.update_traces(
+            marker=dict(size=4, color='#999'),
+            name='Population unknown', showlegend=True,
+        )
+        fig.add_traces(rest.data)
+    # State borders from the bundled shapefile instead of map tiles
+    lons, lats = state_outlines(level_for_zoom(3))
+    fig.add_trace(go.Scattergeo(
+        lon=lons, lat=lats, mode='lines',
+        line=dict(width=0.6, color='#555'),
+        hoverinfo='skip', showlegend=False,
+    ))
+    fig.update_geos(scope='usa', visible=False)
+    plotly_chart(fig, use_container_width=True)
     st.markdown('---')
 
     st.header('Findings & Commentary')
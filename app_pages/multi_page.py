@@ -1,10 +1,41 @@
+import importlib
+import logging
+import threading
+
 import streamlit as st
+from utils import profiling
+
+logger = logging.getLogger(__name__)
+
+# Process-wide: startup time is reported once, pages are warmed once
+_first_render_lock = threading.Lock()
+_first_render_done = False
+_warm_started = False
+
+
+def _resolve(target):
+    """Return the page function for a callable or a 'module:function' path."""
+    if callable(target):
+        return target
+    module_name, _, func_name = target.partition(':')
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def _warm(targets) -> None:
+    for target in targets:
+        try:
+            _resolve(target)
+        except Exception:
+            logger.exception("Warming page %s failed", target)
+
 
 class MultiPage:
 
-    def __init__(self, app_name) -> None:
+    def __init__(self, app_name, *, warm_pages=False) -> None:
         self.pages = []
         self.app_name = app_name
+        self.warm_pages = warm_pages
+        self.data_loader = None
 
 
         st.set_page_config(
@@ -12,10 +43,50 @@ class MultiPage:
             page_icon=":bar_chart:"
         )
 
-    def add_page(self, title, func) -> None:
-        self.pages.append({"title": title, "function": func})
+    def add_page(self, title, func, *, needs_data=True) -> None:
+        # func is either the page function or a 'module:function' path that
+        # is imported the first time the page is shown
+        self.pages.append({"title": title, "function": func, "needs_data": needs_data})
+
+    def set_data_loader(self, loader) -> None:
+        # Called before the first page with needs_data=True; its result is
+        # kept in st.session_state.loaded_data for the session
+        self.data_loader = loader
 
     def run(self):
         st.title(self.app_name)
         page = st.sidebar.radio("Menu", self.pages, format_func=lambda page: page["title"])
-        page["function"]()
+        with profiling.page_run(page["title"]):
+            if page["needs_data"]:
+                self._ensure_data()
+            if not callable(page["function"]):
+                with profiling.span('import', target=page["function"]):
+                    page["function"] = _resolve(page["function"])
+            page["function"]()
+        profiling.render_panel()
+        self._after_first_render()
+
+    def _ensure_data(self) -> None:
+        if self.data_loader is None or 'loaded_data' in st.session_state:
+            return
+        with profiling.span('load data'), st.spinner("Loading data..."):
+            st.session_state.loaded_data = self.data_loader()
+
+    def _after_first_render(self) -> None:
+        global _first_render_done, _warm_started
+        with _first_render_lock:
+            first = not _first_render_done
+            _first_render_done = True
+            warm = self.warm_pages and not _warm_started
+            _warm_started = _warm_started or warm
+        if first:
+            seconds = profiling.process_age_seconds()
+            logger.info("First page rendered %.2fs after process start", seconds)
+            profiling.log_event('first_render', seconds=seconds)
+        if warm:
+            # Import the remaining pages off the script thread so switching
+            # pages later does not pay for plotly/matplotlib imports
+            pending = [p["function"] for p in self.pages if not callable(p["function"])]
+            threading.Thread(
+                target=_warm, args=(pending,), name='warm-pages', daemon=True
+            ).start()
@@ -1,6 +1,17 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+from app_pages.dataset import (
+    available_columns,
+    memoize_query,
+    state_geojson,
+    state_points,
+    state_population,
+)
+from utils.profiling import plotly_chart, span
+from utils.state_geometry import level_for_zoom
+from utils.state_year import state_year_means, state_year_table
 
 
 STATE_NAME_TO_ABBR = {
@@ -57,98 +68,56 @@ STATE_NAME_TO_ABBR = {
     'Wyoming': 'WY',
 }
 
-# Approximate land area (sq mi), public data (rounded), includes DC
-STATE_LAND_AREA_SQMI = {
-    'Alabama': 50745,
-    'Alaska': 570641,
-    'Arizona': 113594,
-    'Arkansas': 52035,
-    'California': 155779,
-    'Colorado': 103642,
-    'Connecticut': 4842,
-    'Delaware': 1949,
-    'District of Columbia': 61,
-    'Florida': 53625,
-    'Georgia': 57513,
-    'Hawaii': 6423,
-    'Idaho': 82643,
-    'Illinois': 55519,
-    'Indiana': 35826,
-    'Iowa': 55857,
-    'Kansas': 81823,
-    'Kentucky': 39486,
-    'Louisiana': 43566,
-    'Maine': 30843,
-    'Maryland': 9707,
-    'Massachusetts': 7800,
-    'Michigan': 56804,
-    'Minnesota': 79627,
-    'Mississippi': 46907,
-    'Missouri': 68742,
-    'Montana': 145546,
-    'Nebraska': 76824,
-    'Nevada': 109781,
-    'New Hampshire': 8953,
-    'New Jersey': 7354,
-    'New Mexico': 121365,
-    'New York': 47126,
-    'North Carolina': 48618,
-    'North Dakota': 69001,
-    'Ohio': 40861,
-    'Oklahoma': 68595,
-    'Oregon': 95997,
-    'Pennsylvania': 44743,
-    'Rhode Island': 1034,
-    'South Carolina': 30061,
-    'South Dakota': 75811,
-    'Tennessee': 41235,
-    'Texas': 261232,
-    'Utah': 82170,
-    'Vermont': 9217,
-    'Virginia': 39598,
-    'Washington': 66456,
-    'West Virginia': 24038,
-    'Wisconsin': 54158,
-    'Wyoming': 97093,
-}
+
+def _state_year(population, df):
+    # Mean AQI of every state and year, next to its population and density
+    measures = [c for c in df.columns if c.endswith(' AQI')]
+    return state_year_table(population, state_year_means(df, measures))
 
 
 def population_map_body():
     st.write("# Population Map (Static Choropleth)")
 
-    if 'loaded_data' not in st.session_state:
-        st.info("Load data first to view the population map.")
-        return
-
-    df = st.session_state.loaded_data
-    if 'population_state' not in df.columns:
+    population = state_population()
+    if population is None:
         st.warning(
-            "State population not found. I'll keep the page, but we need the "
-            "population enrichment artifacts to render this choropleth."
+            "State population file not found "
+            "(data/processed/pop_state_year_2000_2016_partial.csv)."
         )
         return
 
-    # Derive year values; filter to rows with population available
-    if 'Date Local' not in df.columns:
-        st.warning("Missing 'Date Local' column to select a year.")
-        return
-
-    dfx = df.copy()
-    dfx['year'] = pd.to_datetime(dfx['Date Local']).dt.year
-    dfx = dfx.dropna(subset=['population_state'])
-    if dfx.empty:
-        st.warning("No rows with state population available to plot.")
-        return
+    # One row per state and year, built once per data file; every switch
+    # below only selects from it
+    columns = available_columns()
+    aqi_cols = [c for c in columns if c.endswith(' AQI')]
+    if {'State', 'Date Local'} <= set(columns):
+        with span('data prep'):
+            table = memoize_query(
+                ('population_map',),
+                ['State', 'Date Local', *aqi_cols],
+                lambda df: _state_year(population, df),
+            )
+    else:
+        aqi_cols = []
+        table = _state_year(population, pd.DataFrame(columns=['State', 'Date Local']))
 
-    years = sorted(dfx['year'].unique())
+    years = sorted(table['year'].unique())
     year = st.selectbox("Select year", options=years, index=len(years) - 1)
+    metrics = {
+        "Population": 'population',
+        "Population density (per sq mi)": 'density',
+        **{f"Mean {c}": c for c in aqi_cols},
+    }
     metric = st.selectbox(
         "Metric",
-        options=[
-            "Population",
-            "Population density (per sq mi)",
-        ],
-        help="Population is total count; density uses state land area.",
+        options=list(metrics),
+        help="Population is total count; density uses state land area; "
+        "mean AQI is over all measurements in the state that year.",
+    )
+    overlay = st.selectbox(
+        "Overlay pollution",
+        options=["None", *aqi_cols],
+        help="Mark each state with a circle sized by its mean AQI.",
     )
     scale_mode = st.selectbox(
         "Color scaling",
@@ -164,32 +133,29 @@ def population_map_body():
             step=1,
         )
 
-    # Aggregate to one row per state for the selected year
-    plot_df = (
-        dfx.loc[dfx['year'] == year]
-        .groupby('State', as_index=False)['population_state']
-        .max()
-        .rename(columns={'population_state': 'Population'})
-    )
-
-    # Map to state abbreviations for Plotly USA choropleth mode
-    plot_df['abbr'] = plot_df['State'].map(STATE_NAME_TO_ABBR)
-    plot_df = plot_df.dropna(subset=['abbr'])
-
-    if metric != "Population":
-        plot_df['area_sqmi'] = plot_df['State'].map(STATE_LAND_AREA_SQMI)
-        plot_df['Density'] = plot_df['Population'] / plot_df['area_sqmi']
-    
+    color_col = metrics[metric]
+    plot_df = table[table['year'] == year].dropna(subset=[color_col])
     if plot_df.empty:
-        st.warning("No state-level data to display for the selected year.")
+        st.warning(f"No state-level {metric.lower()} to display for {year}.")
         return
+    plot_df = plot_df.rename(columns={'population': 'Population', 'density': 'Density'})
+    color_col = {'population': 'Population', 'density': 'Density'}.get(color_col, color_col)
 
-    color_col = 'Population' if metric == 'Population' else 'Density'
-    hover = {'State': True, 'abbr': False}
-    if 'Population' in plot_df.columns:
-        hover['Population'] = ':.0f'
-    if 'Density' in plot_df.columns and metric != 'Population':
-        hover['Density'] = ':.1f'
+    # Outlines from the bundled shapefile; Plotly's built-in USA states
+    # otherwise
+    geojson = state_geojson(level_for_zoom(3))
+    if geojson is not None:
+        where = dict(geojson=geojson, locations='State', featureidkey='id')
+    else:
+        plot_df['abbr'] = plot_df['State'].map(STATE_NAME_TO_ABBR)
+        plot_df = plot_df.dropna(subset=['abbr'])
+        where = dict(locations='abbr', locationmode='USA-states')
+
+    hover = {'State': True, 'abbr': False, 'Population': ':,.0f', 'Density': ':.1f'}
+    hover = {k: v for k, v in hover.items() if k in plot_df.columns}
+    for c in dict.fromkeys([color_col, overlay]):
+        if c in aqi_cols:
+            hover[c] = ':.1f'
 
     if scale_mode == "Quantile bins":
         series = plot_df[color_col].astype(float)
@@ -206,11 +172,10 @@ def population_map_body():
         palette = palette[:k]
         fig = px.choropleth(
             plot_df,
-            locations='abbr',
-            locationmode='USA-states',
+            **where,
             color='bin',
             color_discrete_sequence=palette,
-            scope='usa',
+            category_orders={'bin': list(plot_df['bin'].cat.categories)},
             hover_data=hover,
         )
         # Build legend caption with quantile breakpoints
@@ -219,9 +184,9 @@ def population_map_body():
             edges = series.quantile(qs).tolist() if qs else []
         except Exception:
             edges = []
-        
+
         def _fmt(v: float) -> str:
-            if metric == 'Population':
+            if color_col == 'Population':
                 try:
                     return f"{int(round(v)):,}"
                 except Exception:
@@ -242,24 +207,50 @@ def population_map_body():
     else:
         fig = px.choropleth(
             plot_df,
-            locations='abbr',
-            locationmode='USA-states',
+            **where,
             color=color_col,
             color_continuous_scale='Viridis',
-            scope='usa',
             hover_data=hover,
         )
-    title_metric = (
-        'Population' if metric == 'Population' else 'Population Density'
-    )
+
+    if overlay != "None":
+        points = state_points(level_for_zoom(3))
+        marks = plot_df.dropna(subset=[overlay])
+        marks = marks[marks['State'].isin(list(points))]
+        if marks.empty:
+            st.info(f"No {overlay} measurements for {year}.")
+        else:
+            lon, lat = zip(*(points[s] for s in marks['State']))
+            fig.add_trace(go.Scattergeo(
+                lon=lon, lat=lat, mode='markers',
+                marker=dict(
+                    size=marks[overlay], sizemode='area',
+                    sizeref=2 * max(marks[overlay].max(), 1) / 30 ** 2, sizemin=2,
+                    color='rgba(214, 39, 40, 0.55)',
+                    line=dict(width=0.8, color='#7f0000'),
+                ),
+                text=[f"{s}: {v:.1f}" for s, v in zip(marks['State'], marks[overlay])],
+                hoverinfo='text',
+                name=f"Mean {overlay}",
+            ))
+
+    fig.update_geos(scope='usa', visible=False)
+    title_metric = {
+        'Population': 'Population', 'Density': 'Population Density'
+    }.get(color_col, metric)
     fig.update_layout(
         height=650,
         margin=dict(l=0, r=0, t=30, b=0),
         title=f"State {title_metric} — {year}",
     )
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
-    if metric == 'Population':
+    if plot_df['interpolated'].any():
+        st.caption(
+            f"Populations for {year} are interpolated linearly between the "
+            "2000 and 2010 censuses."
+        )
+    if color_col == 'Population':
         st.caption(
             "Tip: Switch to 'Population density (per sq mi)' to normalize "
             "by state land area."
@@ -1,6 +1,22 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
+from app_pages.dataset import available_columns, memoize_query
+from utils.box_stats import grouped_box_stats
+from utils.population_join import enrich_with_region
+from utils.profiling import plotly_chart, span
+
+
+def _region_stats(df):
+    # Exact box statistics over every row of the pollutant
+    region_col, pollutant = df.columns
+    if region_col == 'State':
+        # Data built before the region enrichment
+        df = enrich_with_region(df)
+        region_col = 'region'
+    regions = df[region_col].astype(object)
+    regions = regions.where(regions != '')
+    return grouped_box_stats(regions, df[[pollutant]], group_name='region', var_name='pollutant')
+
 
 def regional_differences_body():
     st.title('Regional Pollution Differences')
@@ -8,38 +24,61 @@ def regional_differences_body():
     st.write('Pollution levels vary significantly between different regions of the United States due to factors such as geography, climate, and local sources.')
     st.markdown('---')
 
-    df = st.session_state.loaded_data.copy()
+    columns = available_columns()
     region_col = None
     for col in ['region', 'Region', 'us_region', 'state_region']:
-        if col in df.columns:
+        if col in columns:
             region_col = col
             break
+    if not region_col and 'State' in columns:
+        region_col = 'State'
     if not region_col:
         st.error('No region column found in dataset.')
         return
-    pollutants = [c for c in df.columns if c.endswith(' AQI') or c.endswith(' Mean')]
+    pollutants = [c for c in columns if c.endswith(' AQI') or c.endswith(' Mean')]
     if not pollutants:
         st.warning('No pollutant columns found in the dataset.')
         return
     selected_pollutant = st.selectbox('Select pollutant to compare by region:', pollutants)
-    plot_df = df.dropna(subset=[region_col, selected_pollutant])
-    # Remove rows with invalid region values
-    plot_df = plot_df[plot_df[region_col].notnull() & (plot_df[region_col] != '')]
-    # Sample if dataset is large
-    max_rows = 2000
-    if len(plot_df) > max_rows:
-        plot_df = plot_df.sample(n=max_rows, random_state=42)
-    if plot_df.empty:
+    with span('data prep'):
+        stats = memoize_query(
+            ('regional_differences',), [region_col, selected_pollutant], _region_stats
+        )
+    if stats.empty:
         st.warning('No valid data to plot for the selected pollutant and region.')
         return
-    fig = px.box(plot_df, x=region_col, y=selected_pollutant, points='all', title=f'{selected_pollutant} by Region')
-    st.plotly_chart(fig, use_container_width=True)
+    stats = stats.loc[selected_pollutant]
+    # Plotly draws the boxes from the precomputed statistics; no rows are sent
+    fig = go.Figure(go.Box(
+        x=list(stats.index),
+        q1=stats['q1'], median=stats['median'], q3=stats['q3'],
+        lowerfence=stats['lowerfence'], upperfence=stats['upperfence'],
+        mean=stats['mean'],
+        name=selected_pollutant,
+    ))
+    fig.update_layout(
+        title=f'{selected_pollutant} by Region',
+        xaxis_title='region',
+        yaxis_title=selected_pollutant,
+    )
+    plotly_chart(fig, use_container_width=True)
+    st.write('Outliers (values beyond 1.5 IQR of the box) per region:')
+    st.dataframe(
+        stats[['count', 'n_outliers_low', 'n_outliers_high', 'min', 'max']].rename(columns={
+            'count': 'Measurements',
+            'n_outliers_low': 'Low outliers',
+            'n_outliers_high': 'High outliers',
+            'min': 'Lowest value',
+            'max': 'Highest value',
+        })
+    )
     st.markdown('---')
     st.header('Findings & Commentary')
     st.markdown('''
 **How to interpret the chart:**
 - Each boxplot shows the distribution of pollutant values for a US region (West, Northeast, Midwest, South, Other).
-- The box represents the median and quartiles; dots show individual data points and outliers.
+- The box represents the median and quartiles of every measurement in the region; whiskers reach the most extreme values within 1.5 IQR of the box.
+- The table below the chart counts the outliers beyond the whiskers and shows the extreme values.
 - Higher boxes mean higher pollution levels in that region.
 - The "Other" region includes records not matched to a standard US region (e.g., non-US states or unrecognized names).
 - Compare boxes to see which regions have more pollution or variability.
@@ -1,43 +1,47 @@
 import streamlit as st
-import numpy as np
-import pandas as pd
-from datetime import datetime
 import plotly.express as px
+from app_pages.dataset import get_cube, memoize
+from utils.aggregate_cube import rollup
+from utils.period_rollup import period_store
+from utils.profiling import plotly_chart, span
 
-def time_series_body():
-    df = st.session_state.loaded_data
+ALL_STATES = 'ALL STATES'
 
-    st.write("## Pollution Over Time")
 
+def _build_series_store(df):
     # Only use AQI columns that exist in the DataFrame
     possible_aqi_cols = ['NO2 AQI', 'O3 AQI', 'SO2 AQI', 'CO AQI']
-    available_aqi_cols = [col for col in possible_aqi_cols if col in df.columns]
-    if not available_aqi_cols:
-        st.error("No AQI columns found in the dataset.")
-        return
-    df_state = df.groupby(['State', 'Date Local'], sort=False)[available_aqi_cols].mean().reset_index()
-    df_state = df_state.melt(id_vars=['State', 'Date Local'], value_vars=available_aqi_cols, var_name='pollutant', value_name='aqi')
+    aqi_cols = [col for col in possible_aqi_cols if col in df.columns]
+    if not aqi_cols:
+        return None
+    # Mean AQI per state and day, rolled up to every time display on
+    # integer period codes
+    with span('rollup'):
+        state_day = rollup(get_cube()['state_day'], ['State', 'Date Local'], aqi_cols)
+        series = period_store(
+            state_day,
+            group_level='State',
+            date_level='Date Local',
+            all_key=ALL_STATES,
+            var_name='pollutant',
+            value_name='aqi',
+        )
+    states = sorted({state for state, _ in series if state != ALL_STATES})
+    return {'states': [ALL_STATES] + states, 'series': series}
 
-    # group data by time values, default year
-    # select for year + month, month mean, daily mean and day of week
-    # convert Date Local to date format
-    df_state['Date Local'] = pd.to_datetime(df_state['Date Local'])
-    df_state.sort_values(by='Date Local', inplace=True)
 
-    @st.cache_data
-    def add_cols(df_state):
-        # add datetime columns for charts
-        df_state['year'] = df_state['Date Local'].dt.year
-        df_state['year and month'] = df_state['Date Local'].dt.strftime('%Y %b')
-        df_state['month'] = df_state['Date Local'].dt.month
-        df_state['day of year'] = df_state['Date Local'].dt.dayofyear
-        return df_state
+def time_series_body():
+    st.write("## Pollution Over Time")
 
-    df_state = add_cols(df_state)
+    # Every (state or ALL STATES, time display) result is computed together
+    # once per dataset, so widget changes only look up a precomputed frame
+    store = memoize(('time_series',), _build_series_store)
+    if store is None:
+        st.error("No AQI columns found in the dataset.")
+        return
 
     # make list of states for filtering data
-    state_list = df_state['State'].unique()
-    state_list = np.insert(sorted(state_list), 0, 'ALL STATES')
+    state_list = store['states']
 
     # make list of time selection types
     time_list = {'year': 'Change over time by year', 'year and month': 'Change over time by year and month', 'month': "Seasonality by month", 'day of year': 'Seasonality by day of year'}
@@ -45,26 +49,8 @@ def time_series_body():
     # select action based on chosen variables
     state_sel = st.selectbox(label='Choose a state', options=state_list, key="1")
     time_col = st.selectbox(label='Choose a time display type', options=time_list.keys(), key="2", format_func=lambda x: time_list.get(x))
-   
-    # set up columns to group by
-    group_cols = ['pollutant']
-    group_cols.append(time_col)
-
-    # select specific state if required
-    if state_sel == 'ALL STATES':
-        df_time = df_state
-    else:
-        df_time = df_state.loc[df_state['State'] == state_sel]
-
-    if time_col == 'month':
-        df_time.sort_values(by='month', inplace=True)
-    elif time_col == 'day of year':
-        df_time.sort_values(by='day of year', inplace=True)
-    else:
-        df_time.sort_values(by='Date Local', inplace=True)
 
-    # group data by selections
-    df_time = df_time.groupby(group_cols, sort=False)['aqi'].mean().reset_index()
+    df_time = store['series'][(state_sel, time_col)]
 
     # Defer heavy render until user clicks
     render = st.button("Load Chart")
@@ -76,6 +62,9 @@ def time_series_body():
     # line chart for pollution over time
     # seaborn integration from https://docs.kanaries.net/topics/Streamlit/streamlit-seaborn
     st.write(f"Chart showing AQI by Pollutant over time")
-    fig = px.line(df_time, x=time_col, y='aqi', color='pollutant')
-    st.plotly_chart(fig)
+    with span('figure'):
+        # Labels are in chronological order; keep plotly from re-sorting them
+        fig = px.line(df_time, x=time_col, y='aqi', color='pollutant',
+                      category_orders={time_col: list(dict.fromkeys(df_time[time_col]))})
+    plotly_chart(fig)
     st.write("---")
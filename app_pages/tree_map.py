@@ -1,12 +1,43 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from app_pages.dataset import get_cube, memoize
+from utils.aggregate_cube import rollup
+from utils.profiling import plotly_chart, span
+
+ALL_STATES = 'All states'
+
+
+def _build_tree(df):
+    # Mean AQI and Mean of every gas per city in one rollup of the cube's
+    # location table, plus what each chart needs, split by gas and state
+    cube = get_cube()['location']
+    measures = [c for c in cube['sum'].columns if c.endswith((' AQI', ' Mean'))]
+    cities = rollup(cube, ['State', 'County', 'City'], measures).reset_index()
+
+    states = {}
+    children = {}
+    for gas in ['NO2', 'O3', 'SO2', 'CO']:
+        gas_aqi = gas + ' AQI'
+        gas_mean = gas + ' Mean'
+        if gas_aqi not in cities.columns or gas_mean not in cities.columns:
+            continue
+        # fix zero division error by https://stackoverflow.com/questions/65336361/weights-sum-to-zero-can-t-be-normalized-error-in-treemap-of-plotly-express
+        rows = cities.loc[cities[gas_mean] != 0, ['State', 'County', 'City', gas_aqi, gas_mean]]
+        # State tiles aggregate their cities the way px.treemap does: sizes
+        # add up and colors are averaged weighted by size
+        weighted = (rows[gas_mean] * rows[gas_aqi]).groupby(rows['State'], observed=True).sum()
+        size = rows.groupby('State', observed=True)[gas_aqi].sum()
+        states[gas] = pd.DataFrame({gas_aqi: size, gas_mean: weighted / size}).reset_index()
+        children[gas] = {
+            state: part for state, part in rows.groupby('State', observed=True)
+        }
+    return {'states': states, 'children': children}
+
 
 def tree_map_body():
     st.write("## Tree Map for AQI and mean pollutant levels")
 
-    df = st.session_state.loaded_data
-
     # dictionary for mapping gas names to abbreviations
     # label function from https://discuss.streamlit.io/t/format-func-function-examples-please/11295/3
     gas_options = {'NO2':'Nitrous Oxides', 'O3':'Ozone', 'SO2':'Sulphur Oxide', 'CO':'Carbon Monoxide'}
@@ -16,13 +47,29 @@ def tree_map_body():
     gas_aqi = gas + ' AQI'
     gas_mean = gas + ' Mean'
 
-    df_plot = df.groupby(['State', 'County', 'City'], sort=False)[[gas_aqi, gas_mean]].mean().reset_index()
+    with span('data prep'):
+        tree = memoize(('tree_map',), _build_tree)
+    if gas not in tree['states']:
+        st.error(f"No {gas} AQI/Mean columns found in the dataset.")
+        return
 
-    # fix zero division error by https://stackoverflow.com/questions/65336361/weights-sum-to-zero-can-t-be-normalized-error-in-treemap-of-plotly-express
-    df_plot = df_plot.loc[df_plot[gas_mean]!=0]
+    # Only the State level is sent at first; a state's counties and cities
+    # are sent when it is selected here
+    state = st.selectbox(
+        'Drill down into a state',
+        options=[ALL_STATES] + sorted(tree['children'][gas]),
+        key="2",
+    )
+    if state == ALL_STATES:
+        df_plot = tree['states'][gas]
+        path = [px.Constant('United States'), 'State']
+    else:
+        df_plot = tree['children'][gas][state]
+        path = ['State', 'County', 'City']
 
     st.write(f"Chart for {gas_options.get(gas)} AQI")
-    fig = px.treemap(data_frame=df_plot, path=[px.Constant('United States'), 'State','County', 'City'], values=gas_aqi, color=gas_mean, maxdepth=2, 
-                     width=800,height=600, color_continuous_scale='dense')
-    st.plotly_chart(fig)
-    st.write("---")
\ No newline at end of file
+    with span('figure'):
+        fig = px.treemap(data_frame=df_plot, path=path, values=gas_aqi, color=gas_mean, maxdepth=2,
+                         width=800,height=600, color_continuous_scale='dense')
+    plotly_chart(fig)
+    st.write("---")
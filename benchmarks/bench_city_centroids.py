@@ -0,0 +1,137 @@
+"""
+Benchmark for ``utils.city_centroids.apply_city_centroids``.
+
+Builds synthetic State/County/City rows from the keys in
+``data/processed/city_centroids.json`` (raw spellings, e.g. "Maricopa County",
+plus a share of unmatched cities) and reports the per-row cost of the join.
+The previous row-wise ``df.apply`` lookup is timed on a smaller sample for
+comparison, and the vectorized join is checked to give the same frame on
+that sample.
+
+Usage::
+
+    python -m benchmarks.bench_city_centroids [--rows 1000000 10000000]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.city_centroids import (
+    apply_city_centroids,
+    load_centroids_json,
+    normalize_city,
+    normalize_county,
+)
+
+CENTROIDS_PATH = 'data/processed/city_centroids.json'
+
+
+def synthetic_locations(centroids, n: int, *, miss_rate: float = 0.2,
+                        seed: int = 0) -> pd.DataFrame:
+    """Rows of raw (State, County, City) names drawn from the centroid keys."""
+    states, counties, cities = [], [], []
+    for st, county_map in centroids.items():
+        for co, city_map in county_map.items():
+            for ci in city_map:
+                states.append(st)
+                counties.append(co.title() + ' County')
+                cities.append(ci.title())
+                # An unmatched city in the same county
+                states.append(st)
+                counties.append(co.title() + ' County')
+                cities.append(ci.title() + ' Heights')
+    states = np.array(states, dtype=object)
+    counties = np.array(counties, dtype=object)
+    cities = np.array(cities, dtype=object)
+    matched = np.arange(0, len(states), 2)
+    unmatched = matched + 1
+
+    rng = np.random.default_rng(seed)
+    pick = np.where(
+        rng.random(n) < miss_rate,
+        rng.choice(unmatched, n),
+        rng.choice(matched, n),
+    )
+    return pd.DataFrame({
+        'State': states[pick],
+        'County': counties[pick],
+        'City': cities[pick],
+    })
+
+
+def legacy_apply_city_centroids(df: pd.DataFrame, centroids) -> pd.DataFrame:
+    """The row-wise implementation the vectorized join replaced."""
+    for col in ('lat_city', 'lon_city', 'coord_source_city'):
+        if col not in df.columns:
+            df[col] = None
+
+    def _lookup(row):
+        st = str(row['State']).strip()
+        co = normalize_county(row['County']).strip().lower()
+        ci = normalize_city(row['City'])
+        try:
+            city_info = centroids[st][co][ci]
+            return float(city_info.get('lat')), float(city_info.get('lon'))
+        except Exception:
+            return None
+
+    cols = ['State', 'County', 'City']
+    mask = df[cols].notna().all(axis=1)
+    latlon = df.loc[mask, cols].apply(_lookup, axis=1)
+    hit_mask = latlon.notna()
+    if hit_mask.any():
+        hits = df.loc[mask].loc[hit_mask]
+        hits = hits.assign(_latlon=latlon.loc[hit_mask].values)
+        df.loc[hits.index, 'lat_city'] = hits['_latlon'].map(lambda t: t[0])
+        df.loc[hits.index, 'lon_city'] = hits['_latlon'].map(lambda t: t[1])
+        df.loc[hits.index, 'coord_source_city'] = 'city_county_state'
+    return df
+
+
+def _time(func, df, centroids):
+    frame = df.copy()
+    start = time.perf_counter()
+    out = func(frame, centroids)
+    return time.perf_counter() - start, out
+
+
+def _check(out: pd.DataFrame, expected: pd.DataFrame) -> None:
+    pd.testing.assert_frame_equal(out, expected)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_city_centroids')
+    parser.add_argument(
+        '--rows', type=int, nargs='+', default=[1_000_000, 10_000_000]
+    )
+    parser.add_argument(
+        '--legacy-rows',
+        type=int,
+        default=100_000,
+        help='Rows for the row-wise baseline (0 to skip)',
+    )
+    args = parser.parse_args(argv)
+
+    centroids = load_centroids_json(CENTROIDS_PATH)
+    print(f"{'implementation':<12} {'rows':>12} {'total s':>10} {'ns/row':>10}")
+    if args.legacy_rows:
+        # Both joins on the same rows must give the same frame
+        n = args.legacy_rows
+        df = synthetic_locations(centroids, n)
+        secs, expected = _time(legacy_apply_city_centroids, df, centroids)
+        print(f"{'legacy':<12} {n:>12,} {secs:>10.3f} {secs / n * 1e9:>10.1f}")
+        _, out = _time(apply_city_centroids, df, centroids)
+        _check(out, expected)
+    for n in args.rows:
+        df = synthetic_locations(centroids, n)
+        secs, _ = _time(apply_city_centroids, df, centroids)
+        print(f"{'vectorized':<12} {n:>12,} {secs:>10.3f} {secs / n * 1e9:>10.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
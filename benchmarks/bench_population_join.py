@@ -0,0 +1,161 @@
+"""
+Benchmark for ``utils.population_join.enrich_with_state_population`` and
+``enrich_with_city_population``.
+
+Runs both enrichers on synthetic rows (``benchmarks.synthetic``, raw object
+columns as read from CSV) against the bundled state population file and a
+synthetic city population table, next to the previous string-key merge
+implementations, and checks that the new joins find the same populations
+wherever the old ones did (they also match state names regardless of
+case, e.g. 'District Of Columbia').
+
+Usage::
+
+    python -m benchmarks.bench_population_join [--rows 1000000 5000000]
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import city_population, generate
+from utils.city_centroids import normalize_city
+from utils.population_join import (
+    STATE_NAME_TO_FIPS,
+    _normalize_place_name,
+    enrich_with_city_population,
+    enrich_with_state_population,
+)
+
+POP_STATE_PATH = (
+    Path(__file__).resolve().parent.parent
+    / 'data' / 'processed' / 'pop_state_year_2000_2016_partial.csv'
+)
+
+
+def _legacy_year(df: pd.DataFrame, date_col: str) -> pd.Series:
+    return pd.to_datetime(df[date_col]).dt.year
+
+
+def legacy_state_population(
+    df: pd.DataFrame,
+    *,
+    pop_path: Path | str,
+    state_col: str = 'State',
+    date_col: str = 'Date Local',
+    out_col: str = 'population_state',
+) -> pd.DataFrame:
+    """The string-key merge the integer-key join replaced."""
+    year = _legacy_year(df, date_col)
+    dfx = df.copy()
+    dfx['__year'] = year
+    dfx['__state_fips'] = dfx[state_col].map(STATE_NAME_TO_FIPS)
+
+    pop = pd.read_csv(pop_path, dtype={'state_fips': str})
+    pop = pop.rename(columns={'population': out_col})
+    dfx = dfx.merge(
+        pop[['state_fips', 'year', out_col]],
+        how='left',
+        left_on=['__state_fips', '__year'],
+        right_on=['state_fips', 'year'],
+    )
+    drop_cols = [c for c in ['state_fips', 'year', '__state_fips', '__year'] if c in dfx.columns]
+    if drop_cols:
+        dfx = dfx.drop(columns=drop_cols)
+    return dfx
+
+
+def legacy_city_population(
+    df: pd.DataFrame,
+    *,
+    pop_path: Path | str,
+    state_col: str = 'State',
+    city_col: str = 'City',
+    date_col: str = 'Date Local',
+    out_col: str = 'population_city',
+) -> pd.DataFrame:
+    """The three-string-key merge the integer-key join replaced."""
+    year = _legacy_year(df, date_col)
+    dfx = df.copy()
+    dfx['__year'] = year
+    dfx['__state_fips'] = dfx[state_col].map(STATE_NAME_TO_FIPS).astype(str).str.zfill(2)
+    dfx['__year'] = dfx['__year'].astype(str)
+    dfx['__city_norm'] = dfx[city_col].map(normalize_city)
+
+    pop = pd.read_csv(pop_path, dtype={'state_fips': str})
+    pop['state_fips'] = pop['state_fips'].astype(str).str.zfill(2)
+    pop['year'] = pop['year'].astype(str)
+    pop['__city_norm'] = pop['name'].map(_normalize_place_name)
+    pop_keys = (
+        pop[['state_fips', 'year', '__city_norm', 'population']]
+        .sort_values(
+            ['state_fips', 'year', '__city_norm', 'population'],
+            ascending=[True, True, True, False],
+        )
+        .drop_duplicates(['state_fips', 'year', '__city_norm'], keep='first')
+        .rename(columns={'population': out_col})
+    )
+    dfx = dfx.merge(
+        pop_keys,
+        how='left',
+        left_on=['__state_fips', '__year', '__city_norm'],
+        right_on=['state_fips', 'year', '__city_norm'],
+    )
+    return dfx.drop(
+        columns=['state_fips', 'year', '__state_fips', '__year', '__city_norm']
+    )
+
+
+def _check(out: pd.DataFrame, expected: pd.DataFrame) -> None:
+    col = expected.columns[-1]
+    pd.testing.assert_frame_equal(out.drop(columns=col), expected.drop(columns=col))
+    matched = expected[col].notna()
+    pd.testing.assert_series_equal(
+        out.loc[matched, col], expected.loc[matched, col], check_dtype=False
+    )
+
+
+def _time(func, df, pop_path):
+    start = time.perf_counter()
+    out = func(df, pop_path=pop_path)
+    return time.perf_counter() - start, out
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_population_join')
+    parser.add_argument(
+        '--rows', type=int, nargs='+', default=[1_000_000, 5_000_000]
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pop_city = Path(tmp) / 'pop_city.csv'
+        city_population().to_csv(pop_city, index=False)
+        cases = [
+            ('state', legacy_state_population, enrich_with_state_population, POP_STATE_PATH),
+            ('city', legacy_city_population, enrich_with_city_population, pop_city),
+        ]
+        print(
+            f"{'join':<6} {'rows':>12} {'legacy s':>10} {'integer s':>10} "
+            f"{'speedup':>8} {'matched':>16}"
+        )
+        for n in args.rows:
+            df = generate(n, categorical=False)
+            for name, legacy, current, pop_path in cases:
+                legacy_secs, expected = _time(legacy, df, pop_path)
+                secs, out = _time(current, df, pop_path)
+                _check(out, expected)
+                rates = [f.iloc[:, -1].notna().mean() for f in (expected, out)]
+                print(
+                    f"{name:<6} {n:>12,} {legacy_secs:>10.3f} {secs:>10.3f} "
+                    f"{legacy_secs / secs:>7.1f}x {rates[0]:>7.1%} {rates[1]:>7.1%}"
+                )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
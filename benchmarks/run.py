@@ -0,0 +1,249 @@
+"""
+Benchmark runner for the dashboard's data paths.
+
+For each scale, generates a synthetic dataset (``benchmarks.synthetic``) and
+times:
+
+- the ``utils.population_join`` enrichers,
+- ``dashboard_app.load_data`` from the enriched Parquet file, cold (no
+  Arrow cache) and warm,
+- every ``app_pages/*_body`` function against the loaded data, cold (empty
+  shared memo) and warm (second run),
+
+with Streamlit replaced by ``benchmarks.streamlit_stub``, in a temporary
+directory holding a synthetic state population table and a link to the
+repo's shapefiles. Wall time and process RSS before/after each step are
+written to a JSON file so runs can be compared for regressions.
+
+Usage::
+
+    python -m benchmarks.run [--rows 1000000 5000000 20000000]
+                             [--only PATTERN] [--out bench_results.json]
+"""
+from __future__ import annotations
+
+# The stub has to be in place before anything imports streamlit
+from benchmarks import streamlit_stub
+
+st = streamlit_stub.install()
+
+import argparse  # noqa: E402
+import fnmatch  # noqa: E402
+import gc  # noqa: E402
+import importlib  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import platform  # noqa: E402
+import tempfile  # noqa: E402
+import time  # noqa: E402
+import traceback  # noqa: E402
+from datetime import datetime, timezone  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import psutil  # noqa: E402
+
+from benchmarks.synthetic import city_population, generate, state_population  # noqa: E402
+from utils.population_join import (  # noqa: E402
+    enrich_with_centroids,
+    enrich_with_city_population,
+    enrich_with_county_population,
+    enrich_with_region,
+    enrich_with_state_population,
+)
+from utils.state_year import DEFAULT_POP_STATE_PATH  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PROCESSED = REPO_ROOT / 'data' / 'processed'
+DEFAULT_ROWS = [1_000_000, 5_000_000, 20_000_000]
+
+_PROCESS = psutil.Process()
+
+
+def _rss_mb() -> float:
+    return _PROCESS.memory_info().rss / 2**20
+
+
+class Recorder:
+    def __init__(self, only: str | None = None) -> None:
+        self.results = []
+        self.only = only
+
+    def wanted(self, name: str) -> bool:
+        return self.only is None or fnmatch.fnmatch(name, self.only)
+
+    def time(self, rows: int, name: str, func, phase: str = 'cold'):
+        """Run ``func()`` once, record timing and RSS, return its result."""
+        gc.collect()
+        entry = {
+            'rows': rows,
+            'name': name,
+            'phase': phase,
+            'rss_before_mb': round(_rss_mb(), 1),
+        }
+        start = time.perf_counter()
+        result = None
+        try:
+            result = func()
+        except Exception as exc:
+            entry['error'] = f"{type(exc).__name__}: {exc}"
+            traceback.print_exc()
+        entry['seconds'] = round(time.perf_counter() - start, 4)
+        entry['rss_after_mb'] = round(_rss_mb(), 1)
+        self.results.append(entry)
+        status = entry.get('error', '')
+        print(
+            f"{rows:>12,} {name:<40} {phase:<5} {entry['seconds']:>9.3f}s "
+            f"rss {entry['rss_after_mb']:>8.1f} MB {status}",
+            flush=True,
+        )
+        return result
+
+
+def page_bodies():
+    """(name, function) for every ``*_body`` function in app_pages."""
+    bodies = []
+    for path in sorted((REPO_ROOT / 'app_pages').glob('*.py')):
+        module = importlib.import_module(f'app_pages.{path.stem}')
+        for attr in sorted(vars(module)):
+            func = getattr(module, attr)
+            if (
+                attr.endswith('_body')
+                and callable(func)
+                and getattr(func, '__module__', None) == module.__name__
+            ):
+                bodies.append((f'{path.stem}.{attr}', func))
+    return bodies
+
+
+def _reset_caches() -> None:
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def _write_page_inputs(workdir: Path) -> None:
+    # Files the pages read relative to the working directory: a synthetic
+    # state population table (population map) and the state outlines
+    pop_state = workdir / DEFAULT_POP_STATE_PATH
+    pop_state.parent.mkdir(parents=True, exist_ok=True)
+    state_population().to_csv(pop_state, index=False)
+    (workdir / 'shapefiles').symlink_to(REPO_ROOT / 'shapefiles')
+
+
+def bench_enrichers(rec: Recorder, rows: int, raw: pd.DataFrame,
+                    workdir: Path) -> pd.DataFrame:
+    pop_city = workdir / 'pop_city.csv'
+    city_population().to_csv(pop_city, index=False)
+    df = raw
+    steps = [
+        ('enrich_with_centroids', lambda d: enrich_with_centroids(
+            d, centroids_path=PROCESSED / 'city_centroids.json')),
+        ('enrich_with_state_population', lambda d: enrich_with_state_population(
+            d, pop_path=PROCESSED / 'pop_state_year_2000_2016_partial.csv')),
+        ('enrich_with_city_population', lambda d: enrich_with_city_population(
+            d, pop_path=pop_city)),
+        ('enrich_with_county_population', lambda d: enrich_with_county_population(
+            d, pop_path=PROCESSED / 'pop_county_year_2000_2016_partial.csv')),
+        ('enrich_with_region', enrich_with_region),
+    ]
+    for name, step in steps:
+        if not rec.wanted(name):
+            continue
+        out = rec.time(rows, name, lambda: step(df))
+        if out is not None:
+            df = out
+    return df
+
+
+def bench_load(rec: Recorder, rows: int, enriched: pd.DataFrame,
+               workdir: Path, dashboard) -> pd.DataFrame | None:
+    data_dir = workdir / 'data'
+    data_dir.mkdir(exist_ok=True)
+    enriched.to_parquet(data_dir / 'cleaned_enriched.parquet', index=False)
+    loaded = None
+    if rec.wanted('load_data'):
+        for phase in ('cold', 'warm'):
+            if phase == 'cold':
+                for p in data_dir.glob('*.arrow'):
+                    p.unlink()
+            dashboard._prefetch.clear()
+            loaded = rec.time(rows, 'load_data', dashboard.load_data, phase)
+    if loaded is None:
+        dashboard._prefetch.clear()
+        loaded = dashboard.load_data()
+    return loaded
+
+
+def bench_pages(rec: Recorder, rows: int, loaded: pd.DataFrame) -> None:
+    st.session_state.loaded_data = loaded
+    for name, body in page_bodies():
+        if not rec.wanted(name):
+            continue
+        _reset_caches()
+        # Caches were just emptied; keep the loaded frame itself
+        st.session_state.loaded_data = loaded
+        rec.time(rows, name, body, 'cold')
+        rec.time(rows, name, body, 'warm')
+
+
+def run(rows_list, *, seed: int = 0, only: str | None = None) -> dict:
+    rec = Recorder(only)
+    started = datetime.now(timezone.utc).isoformat()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='us-pollution-bench-') as tmp:
+        workdir = Path(tmp)
+        # dashboard_app starts loading data and renders the default page on
+        # import; import it where no data exists so that is cheap.
+        os.chdir(workdir)
+        _write_page_inputs(workdir)
+        try:
+            dashboard = importlib.import_module('dashboard_app')
+            for rows in rows_list:
+                raw = rec.time(rows, 'generate', lambda: generate(rows, seed=seed))
+                enriched = bench_enrichers(rec, rows, raw, workdir)
+                del raw
+                loaded = bench_load(rec, rows, enriched, workdir, dashboard)
+                del enriched
+                bench_pages(rec, rows, loaded)
+                del loaded
+                st.session_state.clear()
+                _reset_caches()
+        finally:
+            os.chdir(cwd)
+    return {
+        'started': started,
+        'finished': datetime.now(timezone.utc).isoformat(),
+        'seed': seed,
+        'rows': list(rows_list),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'cpu_count': os.cpu_count(),
+            'total_memory_mb': round(psutil.virtual_memory().total / 2**20),
+        },
+        'results': rec.results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run')
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--only',
+        help="Only run steps whose name matches this glob, e.g. 'tree_map*'",
+    )
+    parser.add_argument('--out', type=Path, default=Path('bench_results.json'))
+    args = parser.parse_args(argv)
+
+    report = run(args.rows, seed=args.seed, only=args.only)
+    args.out.write_text(json.dumps(report, indent=2))
+    print(f"Wrote {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,162 @@
+"""
+Minimal stand-in for the ``streamlit`` module so page bodies can be timed
+outside a Streamlit server.
+
+Widgets return their default value (buttons return True so deferred render
+paths run), output calls are no-ops, and ``cache_data``/``cache_resource``
+memoize on their arguments (except those named with a leading underscore)
+like the real decorators. ``install()`` must run before any ``app_pages``
+module is imported.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import sys
+import types
+
+
+class _SessionState(dict):
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError as exc:
+            raise AttributeError(name) from exc
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+    def __delattr__(self, name):
+        del self[name]
+
+
+class _Cache:
+    """``st.cache_data``/``st.cache_resource``: memoize on hashable args."""
+
+    def __init__(self) -> None:
+        self._stores = []
+
+    def __call__(self, func=None, **_kwargs):
+        def wrap(f):
+            results = {}
+            self._stores.append(results)
+            names = list(inspect.signature(f).parameters)
+
+            @functools.wraps(f)
+            def cached(*args, **kwargs):
+                # Like Streamlit, arguments named with a leading underscore
+                # are not part of the key
+                key = (
+                    tuple(a for n, a in zip(names, args) if not n.startswith('_')),
+                    tuple(sorted(
+                        (k, v) for k, v in kwargs.items() if not k.startswith('_')
+                    )),
+                )
+                try:
+                    return results[key]
+                except TypeError:
+                    # Unhashable arguments (e.g. DataFrames) are not cached
+                    return f(*args, **kwargs)
+                except KeyError:
+                    results[key] = f(*args, **kwargs)
+                    return results[key]
+
+            cached.clear = results.clear
+            return cached
+
+        return wrap(func) if func is not None else wrap
+
+    def clear(self) -> None:
+        for results in self._stores:
+            results.clear()
+
+
+def _first(options, index=0):
+    options = list(options)
+    if not options or index is None:
+        return None
+    return options[index]
+
+
+class _Stub(types.ModuleType):
+    """Widget, layout and output API used by the dashboard."""
+
+    def __init__(self) -> None:
+        super().__init__('streamlit')
+        self.session_state = _SessionState()
+        self.secrets = {}
+        self.cache_data = _Cache()
+        self.cache_resource = _Cache()
+        self.sidebar = self
+
+    # Layout
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def columns(self, spec, **_kwargs):
+        n = spec if isinstance(spec, int) else len(spec)
+        return [self] * n
+
+    def tabs(self, labels):
+        return [self] * len(labels)
+
+    def expander(self, *_args, **_kwargs):
+        return self
+
+    def container(self, *_args, **_kwargs):
+        return self
+
+    def spinner(self, *_args, **_kwargs):
+        return self
+
+    def empty(self):
+        return self
+
+    # Widgets
+    def selectbox(self, label, options, index=0, **_kwargs):
+        return _first(options, index)
+
+    def radio(self, label, options, index=0, **_kwargs):
+        return _first(options, index)
+
+    def multiselect(self, label, options, default=None, **_kwargs):
+        return list(default or [])
+
+    def slider(self, label, min_value=None, max_value=None, value=None,
+               step=None, **_kwargs):
+        return min_value if value is None else value
+
+    def select_slider(self, label, options=(), value=None, **_kwargs):
+        return _first(options) if value is None else value
+
+    def number_input(self, label, min_value=None, max_value=None,
+                     value=None, step=None, **_kwargs):
+        return min_value if value is None else value
+
+    def date_input(self, label, value=None, **_kwargs):
+        return value
+
+    def checkbox(self, label, value=False, **_kwargs):
+        return value
+
+    def toggle(self, label, value=False, **_kwargs):
+        return value
+
+    def button(self, *_args, **_kwargs):
+        return True
+
+    # Everything else (st.write, st.plotly_chart, ...) is a no-op
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: None
+
+
+def install() -> _Stub:
+    """Register the stub as ``streamlit`` in sys.modules and return it."""
+    stub = _Stub()
+    sys.modules['streamlit'] = stub
+    return stub
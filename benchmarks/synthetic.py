@@ -0,0 +1,240 @@
+"""
+Synthetic datasets with the Kaggle ``uspollution`` schema (see README.md).
+
+Sites are drawn from the cities in ``data/processed/city_centroids.json`` so
+the State/County/City cardinalities and name spellings match what the
+enrichment joins see in the real data. Larger scales add more monitoring
+sites per city rather than more days, keeping (site, date) unique.
+
+Usage::
+
+    python -m benchmarks.synthetic --rows 1000000 --out data/synthetic.zip
+"""
+from __future__ import annotations
+
+import argparse
+import zipfile
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.city_centroids import load_centroids_json
+from utils.population_join import STATE_NAME_TO_FIPS
+
+CENTROIDS_PATH = (
+    Path(__file__).resolve().parent.parent
+    / 'data' / 'processed' / 'city_centroids.json'
+)
+
+FIRST_DATE = pd.Timestamp('2000-01-01')
+LAST_DATE = pd.Timestamp('2016-05-31')
+
+GASES = ('NO2', 'O3', 'SO2', 'CO')
+
+# Column order as listed in README.md
+COLUMNS = (
+    ['State Code', 'County Code', 'State', 'County', 'City',
+     'Site Num', 'Address', 'Date Local']
+    + [
+        f'{gas} {measure}'
+        for gas in GASES
+        for measure in ('Mean', '1st Max Value', '1st Max Hour', 'AQI')
+    ]
+)
+
+# (gamma shape, gamma scale) of the daily mean per gas, in the README units
+_MEAN_DIST = {
+    'NO2': (2.0, 6.5),
+    'O3': (6.0, 0.0045),
+    'SO2': (1.2, 1.5),
+    'CO': (2.0, 0.18),
+}
+# Share of days without a reading, per gas
+_MISSING = {'NO2': 0.0, 'O3': 0.0, 'SO2': 0.05, 'CO': 0.05}
+# Rough AQI per unit of the daily max
+_AQI_PER_UNIT = {'NO2': 0.9, 'O3': 900.0, 'SO2': 1.4, 'CO': 11.0}
+
+
+def base_sites(centroids_path: Path | str = CENTROIDS_PATH) -> pd.DataFrame:
+    """One monitoring site per centroid city, with raw dataset spellings."""
+    centroids = load_centroids_json(centroids_path)
+    rows = []
+    for state, county_map in centroids.items():
+        for county, city_map in county_map.items():
+            for city in city_map:
+                rows.append({
+                    'State': state,
+                    'County': county.title(),
+                    'City': city.title(),
+                })
+    sites = pd.DataFrame(rows)
+    fips = sites['State'].map(STATE_NAME_TO_FIPS)
+    sites['State Code'] = pd.to_numeric(fips).fillna(80).astype(np.int64)
+    sites['County Code'] = (
+        sites.groupby('State').cumcount().mul(2).add(1).astype(np.int64)
+    )
+    return sites
+
+
+def _site_table(n_sites: int, rng: np.random.Generator) -> pd.DataFrame:
+    base = base_sites()
+    pick = np.arange(n_sites) % len(base)
+    sites = base.iloc[pick].reset_index(drop=True)
+    sites['Site Num'] = (np.arange(n_sites) // len(base) + 1).astype(np.int64)
+    street = rng.integers(1, 9999, n_sites)
+    sites['Address'] = [
+        f'{s} Monitoring Rd, {c}' for s, c in zip(street, sites['City'])
+    ]
+    return sites
+
+
+def generate(
+    n_rows: int,
+    *,
+    seed: int = 0,
+    categorical: bool = True,
+    rows: Optional[slice] = None,
+) -> pd.DataFrame:
+    """
+    ``n_rows`` daily measurements in the raw ``uspollution`` layout.
+
+    Text columns (including ``Date Local``, as 'YYYY-MM-DD') are returned as
+    categoricals when ``categorical`` is set, which keeps 20M-row frames
+    within a few GB; pass False for plain object columns as read from CSV.
+    ``rows`` selects a part of the dataset (e.g. ``slice(0, 10**6)``) so
+    large datasets can be produced in chunks; the parts line up exactly.
+    """
+    start_row, stop_row, _ = (rows or slice(0, n_rows)).indices(n_rows)
+    n_days = (LAST_DATE - FIRST_DATE).days + 1
+    per_site = max(int(n_days * 0.8), 1)
+    n_sites = max(len(base_sites()), -(-n_rows // per_site))
+    site_rng = np.random.default_rng(seed)
+    sites = _site_table(n_sites, site_rng)
+    first_day = site_rng.integers(0, n_days, n_sites)
+
+    # Each site reports a contiguous run of days from a random start
+    rows_per_site = -(-n_rows // n_sites)
+    row = np.arange(start_row, stop_row)
+    site = row // rows_per_site
+    day = (first_day[site] + row % rows_per_site) % n_days
+    n = len(row)
+    rng = np.random.default_rng([seed, start_row])
+
+    data = {}
+    for col in ('State Code', 'County Code', 'Site Num'):
+        data[col] = sites[col].to_numpy()[site]
+    for col in ('State', 'County', 'City', 'Address'):
+        values = pd.Categorical(sites[col])
+        data[col] = pd.Categorical.from_codes(
+            values.codes[site], values.categories
+        )
+    dates = pd.date_range(FIRST_DATE, LAST_DATE, freq='D').strftime('%Y-%m-%d')
+    data['Date Local'] = pd.Categorical.from_codes(day, dates)
+
+    season = 1 + 0.25 * np.sin(2 * np.pi * day / 365.25)
+    for gas in GASES:
+        shape, scale = _MEAN_DIST[gas]
+        mean = rng.gamma(shape, scale, n) * season
+        peak = mean * rng.uniform(1.2, 2.5, n)
+        aqi = np.round(peak * _AQI_PER_UNIT[gas])
+        hour = rng.integers(0, 24, n).astype(np.float64)
+        missing = rng.random(n) < _MISSING[gas]
+        for values in (mean, peak, aqi, hour):
+            values[missing] = np.nan
+        data[f'{gas} Mean'] = mean
+        data[f'{gas} 1st Max Value'] = peak
+        data[f'{gas} 1st Max Hour'] = hour
+        data[f'{gas} AQI'] = aqi
+
+    index = pd.RangeIndex(start_row, stop_row)
+    df = pd.DataFrame(data, columns=COLUMNS, index=index)
+    if not categorical:
+        text = ['State', 'County', 'City', 'Address', 'Date Local']
+        df[text] = df[text].astype(object)
+    return df
+
+
+def city_population(
+    centroids_path: Path | str = CENTROIDS_PATH, *, seed: int = 0
+) -> pd.DataFrame:
+    """
+    A city population table in the ``pop_city_year_*`` layout (state_fips,
+    place_fips, year, population, name) for the centroid cities, since that
+    file does not ship with the repo.
+    """
+    rng = np.random.default_rng(seed)
+    sites = base_sites(centroids_path)
+    sites = sites[sites['State'].isin(STATE_NAME_TO_FIPS)]
+    rows = []
+    for i, (state, city) in enumerate(zip(sites['State'], sites['City'])):
+        base = rng.integers(20_000, 3_000_000)
+        for year in range(2000, 2017):
+            rows.append({
+                'state_fips': STATE_NAME_TO_FIPS[state],
+                'place_fips': f'{i:05d}',
+                'year': year,
+                'population': int(base * (1 + 0.008 * (year - 2000))),
+                'name': f'{city} city, {state}',
+            })
+    return pd.DataFrame(rows)
+
+
+def state_population(*, seed: int = 0) -> pd.DataFrame:
+    """
+    A state population table in the ``pop_state_year_*`` layout (state_fips,
+    year, population, name), with the same gap as the bundled file: 2000,
+    then 2010 to 2016.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for state, fips in STATE_NAME_TO_FIPS.items():
+        base = rng.integers(500_000, 35_000_000)
+        for year in (2000, *range(2010, 2017)):
+            rows.append({
+                'state_fips': fips,
+                'year': year,
+                'population': int(base * (1 + 0.008 * (year - 2000))),
+                'name': state,
+            })
+    return pd.DataFrame(rows)
+
+
+def write_base_zip(
+    path: Path | str,
+    n_rows: int,
+    *,
+    seed: int = 0,
+    chunksize: int = 1_000_000,
+) -> None:
+    """
+    Write a zipped CSV shaped like ``data/cleaned_pollution_data.zip`` (with
+    a leading index column), generating ``chunksize`` rows at a time.
+    """
+    p = Path(path)
+    with zipfile.ZipFile(p, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        with zf.open(p.stem + '.csv', 'w', force_zip64=True) as raw:
+            for start in range(0, n_rows, chunksize):
+                chunk = generate(
+                    n_rows, seed=seed, rows=slice(start, start + chunksize)
+                )
+                raw.write(chunk.to_csv(header=(start == 0)).encode('utf-8'))
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.synthetic')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', type=Path, required=True,
+                        help='Output .zip (CSV) or .parquet path')
+    args = parser.parse_args(argv)
+    if args.out.suffix == '.parquet':
+        generate(args.rows, seed=args.seed).to_parquet(args.out, index=False)
+    else:
+        write_base_zip(args.out, args.rows, seed=args.seed)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,58 +1,138 @@
-
+import logging
 import streamlit as st
 from app_pages.multi_page import MultiPage
+from app_pages import dataset
 import pandas as pd
-from app_pages.intro import intro_body
-from app_pages.heat_map import heat_map_body
-from app_pages.time_series import time_series_body
-from app_pages.tree_map import tree_map_body
-from utils.population_join import (
-    enrich_with_centroids,
-    enrich_with_state_population,
-    enrich_with_city_population,
-)
+from utils.build_enriched import build_enriched, enrich_chunk, iter_base_chunks
+from utils.population_join import enrich_with_county_population
+from utils.schema import normalize_schema
+from utils.arrow_store import is_current, read_arrow, write_arrow
+from utils.partitioned_store import read_frame
 from pathlib import Path
-from app_pages.measurement_coverage import measurement_coverage_body
-from app_pages.population_correlation import population_correlation_body
-from app_pages.event_impact import event_impact_body
-from app_pages.regional_differences import regional_differences_body
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Pages get views that share memory with the loaded dataset (see
+# app_pages.dataset); copy-on-write keeps their edits from reaching it.
+# Set once here, before any page or loader thread runs.
+pd.set_option('mode.copy_on_write', True)
 
-app = MultiPage("US Pollution Dashboard")
+app = MultiPage("US Pollution Dashboard", warm_pages=True)
 
 # Put Heat Map first so the app loads a robust page by default
 # Load a light page first so initial render is fast
-app.add_page("Introduction", intro_body)
-app.add_page("Heat Map", heat_map_body)
-app.add_page("Measurement Coverage", measurement_coverage_body)
-app.add_page("Population & Pollution Correlation", population_correlation_body)
-app.add_page("Pollution Over Time", time_series_body)
-app.add_page("Tree Map", tree_map_body)
-app.add_page("Event Impact Dashboard", event_impact_body)
-app.add_page("Regional Differences", regional_differences_body)
+# Pages are imported on first use (and warmed in the background after the
+# first render), so plotly/matplotlib are not loaded before Introduction.
+app.add_page("Introduction", "app_pages.intro:intro_body", needs_data=False)
+app.add_page("Heat Map", "app_pages.heat_map:heat_map_body", needs_data=False)
+app.add_page("Measurement Coverage", "app_pages.measurement_coverage:measurement_coverage_body", needs_data=False)
+app.add_page("Population Map", "app_pages.population_map:population_map_body", needs_data=False)
+app.add_page("Population & Pollution Correlation", "app_pages.population_correlation:population_correlation_body", needs_data=False)
+app.add_page("Pollution Over Time", "app_pages.time_series:time_series_body")
+app.add_page("Tree Map", "app_pages.tree_map:tree_map_body")
+app.add_page("Event Impact Dashboard", "app_pages.event_impact:event_impact_body")
+app.add_page("Regional Differences", "app_pages.regional_differences:regional_differences_body", needs_data=False)
 
-# cache data for faster loading on page changes
+# Load the data once per process and share it between sessions. The
+# normalized frame is materialized as an Arrow IPC file and memory-mapped, so
+# every session holds a reference to the same read-only, page-cache backed
+# data (pages get copy-on-write views via app_pages.dataset).
+#
+# Loading starts on a background thread when the first session starts and is
+# only awaited by pages that need data, so the Introduction page renders
+# without waiting for it.
 
 
-@st.cache_data
-def load_data():
-    # Prefer pre-enriched Parquet, then CSV zip, then fallback to original
+def _with_county_population(df):
+    # Files enriched before county populations were added
+    if 'population_county' in df.columns:
+        return df
+    return enrich_with_county_population(df)
+
+
+def _read_source(ds_path, pq_path, csv_zip_path, base_path):
+    # A full read is one sequential scan of the single file; the
+    # partitioned copy is for filtered reads (app_pages.dataset.query)
+    if pq_path.exists():
+        return _with_county_population(pd.read_parquet(pq_path)), pq_path
+    if ds_path.is_dir():
+        return _with_county_population(read_frame(ds_path)), ds_path
+    if csv_zip_path.exists():
+        df = pd.read_csv(csv_zip_path, compression='zip')
+        return _with_county_population(df), csv_zip_path
+    # Normally built when the slug is compiled (bin/post_compile); if it is
+    # missing, run the same chunked build rather than enriching the whole
+    # frame in memory.
+    try:
+        build_enriched(base_path=base_path, out_path=pq_path, partitioned_path=ds_path)
+        return pd.read_parquet(pq_path), pq_path
+    except (OSError, ValueError) as exc:
+        # e.g. a read-only data directory (OSError) or a malformed input
+        # file (ValueError, which pyarrow's errors derive from too)
+        logger.warning(
+            "Could not build %s (%s); enriching the dataset in memory", pq_path, exc
+        )
+    # Still chunk by chunk: only one chunk's intermediate frames are alive
+    # at a time on top of the result.
+    try:
+        chunks = [enrich_chunk(chunk) for chunk in iter_base_chunks(base_path)]
+    except (OSError, KeyError, ValueError) as exc:
+        logger.warning("Enrichment failed (%s); using the base dataset", exc)
+        chunks = list(iter_base_chunks(base_path))
+    return pd.concat(chunks, ignore_index=True), None
+
+
+def _load_frame():
+    # Runs on the prefetch thread: no st.* calls in here
+    # Prefer pre-enriched Parquet (single file, then the partitioned
+    # dataset), then CSV zip, then fallback to original
+    ds_path = Path("./data/cleaned_enriched")
     pq_path = Path("./data/cleaned_enriched.parquet")
     csv_zip_path = Path("./data/cleaned_enriched.csv.zip")
     base_path = Path("./data/cleaned_pollution_data.zip")
-    df = None
-    if pq_path.exists():
-        df = pd.read_parquet(pq_path)
-    elif csv_zip_path.exists():
-        df = pd.read_csv(csv_zip_path, compression='zip')
-    elif base_path.exists():
-        df = pd.read_csv(base_path, compression='zip', index_col=0)
-        try:
-            df = enrich_with_centroids(df)
-            df = enrich_with_state_population(df)
-            df = enrich_with_city_population(df)
-        except Exception:
-            pass
-    else:
+    arrow_path = Path("./data/cleaned_enriched.arrow")
+    if not (ds_path.is_dir() or pq_path.exists() or csv_zip_path.exists() or base_path.exists()):
+        return None
+
+    for source in (pq_path, ds_path, csv_zip_path):
+        if source.exists():
+            if is_current(arrow_path, source):
+                return read_arrow(arrow_path)
+            break
+
+    df, source = _read_source(ds_path, pq_path, csv_zip_path, base_path)
+    df = normalize_schema(df)
+    if source is None:
+        return df
+    try:
+        write_arrow(df, arrow_path, source=source)
+    except OSError:
+        return df
+    # Swap the private in-memory frame for the shared mapping
+    return read_arrow(arrow_path)
+
+
+@st.cache_resource
+def _prefetch():
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='load-data')
+    future = executor.submit(_load_frame)
+    # The pages' aggregate cube, built on the same thread once loaded
+    dataset.prebuild_cube(executor, future)
+    executor.shutdown(wait=False)
+    return future
+
+
+def load_data():
+    """Wait for the prefetched dataset."""
+    future = _prefetch()
+    try:
+        df = future.result()
+    except Exception:
+        # Do not keep a failed load cached; the next session retries
+        _prefetch.clear()
+        raise
+    if df is None:
         st.error(
             "No suitable data file found. "
             "Please ensure a cleaned dataset is present."
@@ -62,10 +142,14 @@ def load_data():
 
 # save data to session_state for use across app
 # Based on Streamlit community approach for caching across multi-page apps
+# (done by MultiPage before the first page that needs data)
 
 
-if 'loaded_data' not in st.session_state:
-    st.session_state.loaded_data = load_data()
-
+_prefetch()
+app.set_data_loader(load_data)
+# Pages registered with needs_data=False read column/row subsets through
+# dataset.query(), which only falls back to the full dataset when there is
+# no Parquet file
+dataset.set_loader(load_data)
 
 app.run()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Cube table names -> index levels
+CUBE_LEVELS: Dict[str, tuple] = {
+    'state_day': ('State', 'Date Local'),
+    'state_month': ('State', 'month'),
+    'state_year': ('State', 'year'),
+    'location': ('State', 'County', 'City'),
+}
+
+
+def measure_columns(df: pd.DataFrame) -> List[str]:
+    """The ' AQI' and ' Mean' columns the dashboard pages aggregate."""
+    return [c for c in df.columns if c.endswith(' AQI') or c.endswith(' Mean')]
+
+
+def _sum_count(
+    df: pd.DataFrame, keys: List[str], measures: List[str]
+) -> pd.DataFrame:
+    g = df.groupby(keys, observed=True, sort=True)[measures]
+    return pd.concat({'sum': g.sum(), 'count': g.count()}, axis=1)
+
+
+def build_cube(
+    df: pd.DataFrame,
+    *,
+    state_col: str = 'State',
+    date_col: str = 'Date Local',
+    county_col: str = 'County',
+    city_col: str = 'City',
+) -> Dict[str, pd.DataFrame]:
+    """
+    Pre-aggregate every ' AQI'/' Mean' column into the rollups the pages
+    query: state x day, state x month, state x year and state/county/city.
+
+    Each table is indexed by its key levels (see CUBE_LEVELS) and has
+    ('sum', measure) and ('count', measure) columns, so means can be
+    re-aggregated exactly at any coarser level with ``rollup``. Only the
+    state x day and location tables scan the rows; month and year are rolled
+    up from state x day.
+    """
+    measures = measure_columns(df)
+    state_day = _sum_count(df, [state_col, date_col], measures)
+    state_day.index = state_day.index.set_names(CUBE_LEVELS['state_day'])
+
+    states = state_day.index.get_level_values(0)
+    dates = state_day.index.get_level_values(1)
+    months = dates.values.astype('datetime64[M]').astype('datetime64[ns]')
+    state_month = state_day.groupby(
+        [states, pd.Index(months, name='month')], observed=True
+    ).sum()
+    state_year = state_day.groupby(
+        [states, pd.Index(dates.year, name='year')], observed=True
+    ).sum()
+
+    location = _sum_count(df, [state_col, county_col, city_col], measures)
+    location.index = location.index.set_names(CUBE_LEVELS['location'])
+
+    return {
+        'state_day': state_day,
+        'state_month': state_month,
+        'state_year': state_year,
+        'location': location,
+    }
+
+
+def rollup(
+    table: pd.DataFrame,
+    by: Optional[Sequence[str] | str] = None,
+    measures: Optional[Sequence[str]] = None,
+) -> pd.DataFrame | pd.Series:
+    """
+    Mean of each measure over the rows of a cube table, grouped by the index
+    levels in ``by``. With ``by=None`` returns a Series of overall means.
+    Groups with no observations come back as NaN.
+    """
+    if measures is not None:
+        cols = [(stat, m) for stat in ('sum', 'count') for m in measures]
+        table = table[cols]
+    if by is None:
+        totals = table.sum()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return totals['sum'] / totals['count']
+    if isinstance(by, str):
+        by = [by]
+    if list(by) != list(table.index.names):
+        table = table.groupby(level=list(by), observed=True).sum()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return table['sum'] / table['count']
@@ -0,0 +1,91 @@
+"""
+Memory-mapped Arrow IPC copy of the normalized dataset.
+
+The dashboard materializes its typed frame (see ``utils.schema``) once as an
+uncompressed Arrow IPC file and maps it back in. Numeric, datetime and
+dictionary-code columns then point straight into the OS page cache, so the
+frame costs almost no private memory and every session and process shares the
+same pages. The mapped arrays are read-only; callers must not write to them.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from .schema import SCHEMA_VERSION
+
+_META_KEY = b'us_pollution'
+
+
+def _to_table(df: pd.DataFrame, meta: dict) -> pa.Table:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # from_pandas turns NaN into nulls, which forces a copy when mapping the
+    # column back; keep NaN as a value so float columns stay zero-copy.
+    for i, field in enumerate(table.schema):
+        if pa.types.is_floating(field.type) and table.column(i).null_count:
+            values = pa.array(df[field.name].to_numpy(), from_pandas=False)
+            table = table.set_column(i, field, values)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_META_KEY] = json.dumps(meta).encode()
+    return table.replace_schema_metadata(metadata)
+
+
+def write_arrow(
+    df: pd.DataFrame, path: Path | str, *, source: Optional[Path] = None
+) -> None:
+    """
+    Write ``df`` as an uncompressed Arrow IPC file, recording the schema
+    version and the source file's modification time for ``is_current``.
+    """
+    p = Path(path)
+    meta = {'schema_version': SCHEMA_VERSION}
+    if source is not None:
+        meta['source'] = str(source)
+        meta['source_mtime_ns'] = Path(source).stat().st_mtime_ns
+    table = _to_table(df, meta)
+    tmp = p.with_name(f'{p.name}.{os.getpid()}.tmp')
+    with pa.OSFile(str(tmp), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, p)
+
+
+def _read_meta(path: Path) -> Optional[dict]:
+    try:
+        with pa.memory_map(str(path)) as src:
+            schema = pa.ipc.open_file(src).schema
+    except (OSError, pa.ArrowInvalid):
+        return None
+    raw = (schema.metadata or {}).get(_META_KEY)
+    return json.loads(raw) if raw else None
+
+
+def is_current(path: Path | str, source: Path | str) -> bool:
+    """True if ``path`` was written from ``source`` as it is now."""
+    p = Path(path)
+    if not p.exists():
+        return False
+    meta = _read_meta(p)
+    return (
+        meta is not None
+        and meta.get('schema_version') == SCHEMA_VERSION
+        and meta.get('source') == str(source)
+        and meta.get('source_mtime_ns') == Path(source).stat().st_mtime_ns
+    )
+
+
+def read_arrow(path: Path | str) -> pd.DataFrame:
+    """
+    Memory-map an Arrow IPC file written by ``write_arrow`` into a DataFrame
+    without copying column data where Arrow and pandas layouts agree.
+    """
+    source = pa.memory_map(str(path))
+    table = pa.ipc.open_file(source).read_all()
+    # split_blocks keeps one block per column so pandas does not consolidate
+    # (copy) the mapped buffers into 2D blocks.
+    return table.to_pandas(split_blocks=True)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+# Tukey fences: whiskers reach the most extreme values within
+# WHISKER_IQR * IQR of the box
+WHISKER_IQR = 1.5
+
+STAT_COLUMNS = (
+    'count', 'mean', 'min', 'q1', 'median', 'q3', 'max',
+    'lowerfence', 'upperfence', 'n_outliers_low', 'n_outliers_high',
+)
+
+
+def _sorted_groups(values: np.ndarray, bounds: np.ndarray):
+    # ``values`` are grouped into contiguous slices by ``bounds``; sort each
+    # slice without its NaNs and return them concatenated with their sizes
+    parts = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        part = values[lo:hi]
+        parts.append(np.sort(part[~np.isnan(part)]))
+    count = np.array([len(p) for p in parts], dtype=np.int64)
+    return np.concatenate(parts) if parts else np.empty(0), count
+
+
+def _box_stats(s: np.ndarray, count: np.ndarray) -> np.ndarray:
+    n_groups = len(count)
+    codes = np.repeat(np.arange(n_groups), count)
+    start = np.concatenate(([0], np.cumsum(count)[:-1]))
+    has = count > 0
+    last = np.where(has, start + count - 1, 0)
+
+    def quantile(p: float) -> np.ndarray:
+        # numpy's default 'linear' method, for every group at once
+        pos = start + p * (count - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, last)
+        lo = np.where(has, lo, 0)
+        hi = np.where(has, hi, 0)
+        return s[lo] + (pos - lo) * (s[hi] - s[lo])
+
+    out = np.full((n_groups, len(STAT_COLUMNS)), np.nan)
+    if not len(s):
+        out[:, 0] = 0
+        return out
+
+    q1 = quantile(0.25)
+    median = quantile(0.5)
+    q3 = quantile(0.75)
+    iqr = q3 - q1
+    low = q1 - WHISKER_IQR * iqr
+    high = q3 + WHISKER_IQR * iqr
+
+    # Values are sorted within each group, so the number below the lower
+    # limit is the offset of the lower whisker (likewise for the upper one)
+    n_low = np.bincount(codes[s < low[codes]], minlength=n_groups)
+    n_within_high = np.bincount(codes[s <= high[codes]], minlength=n_groups)
+    lowerfence = s[np.where(has, start + n_low, 0)]
+    upperfence = s[np.where(has, start + n_within_high - 1, 0)]
+    sums = np.bincount(codes, weights=s, minlength=n_groups)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cols = (
+            count, sums / count, s[start.clip(max=len(s) - 1)], q1, median,
+            q3, s[last], lowerfence, upperfence, n_low, count - n_within_high,
+        )
+    for j, col in enumerate(cols):
+        out[:, j] = col
+    out[~has, 1:-2] = np.nan
+    return out
+
+
+def grouped_box_stats(
+    groups: pd.Series,
+    values: pd.DataFrame,
+    *,
+    group_name: str = 'group',
+    var_name: str = 'variable',
+) -> pd.DataFrame:
+    """
+    Exact box-plot statistics of every column of ``values`` per group,
+    ignoring NaN: ``count``, ``mean``, ``min``, ``q1``, ``median``, ``q3``
+    (linear interpolation, as ``numpy.quantile``), ``max``, the whisker ends
+    ``lowerfence``/``upperfence`` (most extreme values within 1.5 IQR of the
+    box) and the number of outliers beyond each whisker.
+
+    Rows are ordered by group once and each column is sorted within its
+    groups; all statistics are then read off the sorted values for every
+    group at once. Indexed by (``var_name``, ``group_name``) with groups
+    sorted, empty groups omitted.
+    """
+    group_codes, group_names = pd.factorize(groups, sort=True)
+    # Order rows by group once; each column is then sorted group by group
+    order = np.argsort(group_codes, kind='stable')
+    order = order[group_codes[order] >= 0]
+    bounds = np.searchsorted(
+        group_codes[order], np.arange(len(group_names) + 1)
+    )
+
+    frames = []
+    for col in values.columns:
+        v = values[col].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        stats = pd.DataFrame(
+            _box_stats(*_sorted_groups(v, bounds)),
+            index=pd.Index(np.asarray(group_names), name=group_name),
+            columns=list(STAT_COLUMNS),
+        )
+        stats = stats[stats['count'] > 0]
+        stats.insert(0, var_name, col)
+        frames.append(stats)
+    if not frames:
+        return pd.DataFrame(columns=[var_name, group_name, *STAT_COLUMNS]).set_index(
+            [var_name, group_name]
+        )
+    out = pd.concat(frames).reset_index().set_index([var_name, group_name])
+    for col in ('count', 'n_outliers_low', 'n_outliers_high'):
+        out[col] = out[col].astype(np.int64)
+    return out
+
@@ -0,0 +1,363 @@
+"""
+Offline, chunked build of ``data/cleaned_enriched.parquet``.
+
+Streams the zipped base CSV in bounded-size chunks through the enrichment
+functions in ``utils.population_join`` and appends each enriched chunk to the
+output as a Parquet row group, so peak memory is one chunk rather than the
+full dataset. The build is skipped when the content hashes of all inputs
+match the manifest written by the previous build.
+
+The file is then rewritten as a year/State partitioned dataset
+(``data/cleaned_enriched/``, see ``utils.partitioned_store``) that filtered
+reads use to skip unrelated years and states.
+
+Usage::
+
+    python -m utils.build_enriched [--chunksize N] [--force] [--no-partitioned]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .partitioned_store import DEFAULT_DATASET_PATH, write_partitioned
+from .population_join import (
+    enrich_with_centroids,
+    enrich_with_city_population,
+    enrich_with_county_population,
+    enrich_with_region,
+    enrich_with_state_population,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the enrichment logic changes so existing outputs are rebuilt
+PIPELINE_VERSION = 4
+
+DEFAULT_BASE_PATH = Path('data/cleaned_pollution_data.zip')
+DEFAULT_OUT_PATH = Path('data/cleaned_enriched.parquet')
+DEFAULT_CENTROIDS_PATH = Path('data/processed/city_centroids.json')
+DEFAULT_POP_STATE_PATH = Path(
+    'data/processed/pop_state_year_2000_2016_partial.csv'
+)
+DEFAULT_POP_CITY_PATH = Path(
+    'data/processed/pop_city_year_2000_2016_partial.csv'
+)
+DEFAULT_POP_COUNTY_PATH = Path(
+    'data/processed/pop_county_year_2000_2016_partial.csv'
+)
+DEFAULT_CHUNKSIZE = 250_000
+
+_HASH_BLOCK = 1 << 20
+
+# Column types that must not be inferred from the values of one chunk: a text
+# column that is empty throughout a chunk is read as float, and the codes
+# would become floats wherever a chunk has a gap.
+TEXT_COLUMNS = (
+    'Address', 'State', 'County', 'City', 'Date Local',
+    # added by enrich_chunk
+    'coord_source_city', 'region',
+)
+INTEGER_COLUMNS = ('State Code', 'County Code', 'Site Num')
+
+
+def file_digest(path: Path | str) -> Optional[str]:
+    """Return the sha256 hex digest of a file, or None if it is missing."""
+    p = Path(path)
+    if not p.exists():
+        return None
+    h = hashlib.sha256()
+    with p.open('rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def manifest_path(out_path: Path | str) -> Path:
+    p = Path(out_path)
+    return p.with_name(p.name + '.manifest.json')
+
+
+def input_digests(inputs: Dict[str, Path]) -> Dict[str, Optional[str]]:
+    return {name: file_digest(p) for name, p in inputs.items()}
+
+
+def is_up_to_date(
+    out_path: Path | str, digests: Dict[str, Optional[str]]
+) -> bool:
+    """
+    True when ``out_path`` exists and its manifest records the current
+    pipeline version and the given input hashes.
+    """
+    out = Path(out_path)
+    mpath = manifest_path(out)
+    if not out.exists() or not mpath.exists():
+        return False
+    try:
+        with mpath.open('r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (
+        manifest.get('pipeline_version') == PIPELINE_VERSION
+        and manifest.get('inputs') == digests
+    )
+
+
+def _is_text_column(name: str) -> bool:
+    return name in TEXT_COLUMNS or name.endswith(' Units')
+
+
+def base_dtypes(base_path: Path | str) -> Dict[str, str]:
+    """
+    ``read_csv`` dtypes for the columns of the base CSV named in its header
+    whose type is fixed (see TEXT_COLUMNS and INTEGER_COLUMNS); the measure
+    columns are left to inference.
+    """
+    header = pd.read_csv(base_path, compression='zip', index_col=0, nrows=0)
+    dtypes = {}
+    for name in header.columns:
+        if _is_text_column(name):
+            dtypes[name] = 'object'
+        elif name in INTEGER_COLUMNS:
+            dtypes[name] = 'Int64'
+    return dtypes
+
+
+def iter_base_chunks(
+    base_path: Path | str, chunksize: int = DEFAULT_CHUNKSIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the zipped base CSV in chunks of at most ``chunksize`` rows, all
+    with the same column types (see ``base_dtypes``).
+    """
+    reader = pd.read_csv(
+        base_path, compression='zip', index_col=0, chunksize=chunksize,
+        dtype=base_dtypes(base_path),
+    )
+    with reader:
+        for chunk in reader:
+            yield chunk.reset_index(drop=True)
+
+
+def enrich_chunk(
+    df: pd.DataFrame,
+    *,
+    centroids_path: Path | str = DEFAULT_CENTROIDS_PATH,
+    pop_state_path: Path | str = DEFAULT_POP_STATE_PATH,
+    pop_city_path: Path | str = DEFAULT_POP_CITY_PATH,
+    pop_county_path: Path | str = DEFAULT_POP_COUNTY_PATH,
+) -> pd.DataFrame:
+    df = enrich_with_centroids(df, centroids_path=centroids_path)
+    df = enrich_with_state_population(df, pop_path=pop_state_path)
+    df = enrich_with_city_population(df, pop_path=pop_city_path)
+    df = enrich_with_county_population(df, pop_path=pop_county_path)
+    df = enrich_with_region(df)
+    # Centroid columns start out as object (None) columns; store them as
+    # floats regardless of how many rows in this chunk matched.
+    for col in ('lat_city', 'lon_city'):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col])
+    return df
+
+
+def _arrow_schema(df: pd.DataFrame) -> pa.Schema:
+    """
+    Schema that every chunk is cast to. Text columns (see TEXT_COLUMNS) are
+    strings whatever their values, the nullable integer codes stay int64 and
+    other numeric columns are widened to float64 so a chunk with missing
+    values cannot change a column's type mid-file; everything else
+    non-numeric is stored as string.
+    """
+    fields = []
+    for name, dtype in df.dtypes.items():
+        if _is_text_column(str(name)):
+            typ = pa.string()
+        elif isinstance(dtype, pd.Int64Dtype):
+            typ = pa.int64()
+        elif pd.api.types.is_bool_dtype(dtype):
+            typ = pa.bool_()
+        elif pd.api.types.is_numeric_dtype(dtype):
+            typ = pa.float64()
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            typ = pa.timestamp('ns')
+        else:
+            typ = pa.string()
+        fields.append(pa.field(str(name), typ))
+    return pa.schema(fields)
+
+
+def _as_strings(df: pd.DataFrame, schema: pa.Schema) -> pd.DataFrame:
+    # Object columns can hold floats (e.g. all-None coordinates), and a text
+    # column with no values in this chunk may have come out as float; make
+    # them convertible to the string fields of the schema.
+    out = df
+    for field in schema:
+        col = df[field.name]
+        if field.type != pa.string() or isinstance(col.dtype, pd.StringDtype):
+            continue
+        col = col.astype(object)
+        if out is df:
+            out = df.copy(deep=False)
+        out[field.name] = col.where(col.isna(), col.astype(str))
+    return out
+
+
+def build_enriched(
+    *,
+    base_path: Path | str = DEFAULT_BASE_PATH,
+    out_path: Path | str = DEFAULT_OUT_PATH,
+    centroids_path: Path | str = DEFAULT_CENTROIDS_PATH,
+    pop_state_path: Path | str = DEFAULT_POP_STATE_PATH,
+    pop_city_path: Path | str = DEFAULT_POP_CITY_PATH,
+    pop_county_path: Path | str = DEFAULT_POP_COUNTY_PATH,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    force: bool = False,
+    partitioned_path: Optional[Path | str] = DEFAULT_DATASET_PATH,
+) -> bool:
+    """
+    Build the enriched Parquet file chunk by chunk, then its partitioned
+    copy at ``partitioned_path`` (skipped when None).
+
+    Returns True if the output was (re)written, False if it was already up to
+    date. Raises FileNotFoundError if the base dataset is missing.
+    """
+    base = Path(base_path)
+    out = Path(out_path)
+    if not base.exists():
+        raise FileNotFoundError(f"Base dataset not found: {base}")
+
+    digests = input_digests({
+        'base': base,
+        'centroids': Path(centroids_path),
+        'pop_state': Path(pop_state_path),
+        'pop_city': Path(pop_city_path),
+        'pop_county': Path(pop_county_path),
+    })
+    if not force and is_up_to_date(out, digests):
+        if partitioned_path is None or Path(partitioned_path).exists():
+            logger.info("%s is up to date; skipping rebuild", out)
+            return False
+        write_partitioned(out, partitioned_path)
+        return True
+
+    # Write to a temporary file and swap it in at the end so readers never
+    # see a partially written dataset.
+    tmp = out.with_name(out.name + '.tmp')
+    out.parent.mkdir(parents=True, exist_ok=True)
+    writer = None
+    schema = None
+    rows = 0
+    try:
+        for chunk in iter_base_chunks(base, chunksize):
+            enriched = enrich_chunk(
+                chunk,
+                centroids_path=centroids_path,
+                pop_state_path=pop_state_path,
+                pop_city_path=pop_city_path,
+                pop_county_path=pop_county_path,
+            )
+            if schema is None:
+                schema = _arrow_schema(enriched)
+                writer = pq.ParquetWriter(tmp, schema)
+            enriched = _as_strings(enriched, schema)
+            table = pa.Table.from_pandas(
+                enriched[schema.names], schema=schema, preserve_index=False
+            )
+            writer.write_table(table)
+            rows += len(enriched)
+            logger.info("Wrote %d rows", rows)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    if writer is None:
+        raise ValueError(f"Base dataset is empty: {base}")
+    writer.close()
+    os.replace(tmp, out)
+    if partitioned_path is not None:
+        write_partitioned(out, partitioned_path)
+        logger.info("Wrote partitioned copy %s", partitioned_path)
+
+    manifest = {
+        'pipeline_version': PIPELINE_VERSION,
+        'inputs': digests,
+        'rows': rows,
+    }
+    with manifest_path(out).open('w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return True
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m utils.build_enriched',
+        description='Build data/cleaned_enriched.parquet from the base zip.',
+    )
+    parser.add_argument('--base', type=Path, default=DEFAULT_BASE_PATH)
+    parser.add_argument('--out', type=Path, default=DEFAULT_OUT_PATH)
+    parser.add_argument(
+        '--centroids', type=Path, default=DEFAULT_CENTROIDS_PATH
+    )
+    parser.add_argument(
+        '--pop-state', type=Path, default=DEFAULT_POP_STATE_PATH
+    )
+    parser.add_argument('--pop-city', type=Path, default=DEFAULT_POP_CITY_PATH)
+    parser.add_argument(
+        '--pop-county', type=Path, default=DEFAULT_POP_COUNTY_PATH
+    )
+    parser.add_argument(
+        '--chunksize',
+        type=int,
+        default=DEFAULT_CHUNKSIZE,
+        help='Rows per chunk / Parquet row group',
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Rebuild even if the input hashes are unchanged',
+    )
+    parser.add_argument(
+        '--partitioned-out', type=Path, default=DEFAULT_DATASET_PATH,
+        help='Directory for the year/State partitioned copy',
+    )
+    parser.add_argument(
+        '--no-partitioned',
+        action='store_true',
+        help='Only write the single Parquet file',
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    try:
+        built = build_enriched(
+            base_path=args.base,
+            out_path=args.out,
+            centroids_path=args.centroids,
+            pop_state_path=args.pop_state,
+            pop_city_path=args.pop_city,
+            pop_county_path=args.pop_county,
+            chunksize=args.chunksize,
+            force=args.force,
+            partitioned_path=None if args.no_partitioned else args.partitioned_out,
+        )
+    except FileNotFoundError as exc:
+        logger.error("%s", exc)
+        return 1
+    if built:
+        logger.info("Wrote %s", args.out)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -3,6 +3,7 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Dict, Mapping
 
+import numpy as np
 import pandas as pd
 
 # Public normalization helpers
@@ -43,6 +44,51 @@ def load_centroids_json(path: str | Path) -> CentroidsDict:
 # Application
 
 
+def flatten_centroids(
+    centroids: Mapping[str, Mapping[str, Mapping[str, Mapping[str, float]]]],
+) -> pd.DataFrame:
+    """
+    Flatten the nested centroid mapping into a lat/lon table indexed by
+    (state, county, city) using the mapping's own keys.
+
+    Entries without a usable numeric lat/lon are left out, matching the
+    per-row lookup this replaces.
+    """
+    states, counties, cities, lats, lons = [], [], [], [], []
+    for st, county_map in centroids.items():
+        if not isinstance(county_map, Mapping):
+            continue
+        for co, city_map in county_map.items():
+            if not isinstance(city_map, Mapping):
+                continue
+            for ci, info in city_map.items():
+                try:
+                    lat = float(info.get("lat"))
+                    lon = float(info.get("lon"))
+                except Exception:
+                    continue
+                states.append(st)
+                counties.append(co)
+                cities.append(ci)
+                lats.append(lat)
+                lons.append(lon)
+    index = pd.MultiIndex.from_arrays(
+        [states, counties, cities], names=["state", "county", "city"]
+    )
+    return pd.DataFrame(
+        {"lat": np.asarray(lats, dtype=float),
+         "lon": np.asarray(lons, dtype=float)},
+        index=index,
+    )
+
+
+def _normalized_uniques(values: pd.Series, normalize) -> tuple:
+    """Factorize a column and normalize only its unique values."""
+    codes, uniques = pd.factorize(values)
+    norm = np.array([normalize(v) for v in uniques], dtype=object)
+    return codes, norm
+
+
 def apply_city_centroids(
     df: pd.DataFrame,
     centroids: Mapping[str, Mapping[str, Mapping[str, Mapping[str, float]]]],
@@ -61,6 +107,10 @@ def apply_city_centroids(
 
     - Adds/overwrites lat_col, lon_col, source_col only for matched rows.
     - Returns the same DataFrame instance for convenience.
+
+    Names are normalized once per unique value and the unique
+    (state, county, city) triples are joined against the flattened centroid
+    table in one pass, so the per-row cost is a few integer gathers.
     """
     missing = [
         c for c in (state_col, county_col, city_col) if c not in df.columns
@@ -73,27 +123,44 @@ def apply_city_centroids(
         if col not in df.columns:
             df[col] = None
 
-    def _lookup(row):
-        st = str(row[state_col]).strip()
-        co = normalize_county(row[county_col]).strip().lower()
-        ci = normalize_city(row[city_col])
-        try:
-            city_info = centroids[st][co][ci]
-            return float(city_info.get("lat")), float(city_info.get("lon"))
-        except Exception:
-            return None
-
-    mask = df[[state_col, county_col, city_col]].notna().all(axis=1)
-    latlon = df.loc[mask, [state_col, county_col, city_col]].apply(
-        _lookup, axis=1
+    st_codes, st_norm = _normalized_uniques(
+        df[state_col], lambda v: str(v).strip()
     )
-
-    hit_mask = latlon.notna()
-    if hit_mask.any():
-        hits = df.loc[mask].loc[hit_mask]
-        hits = hits.assign(_latlon=latlon.loc[hit_mask].values)
-        df.loc[hits.index, lat_col] = hits["_latlon"].map(lambda t: t[0])
-        df.loc[hits.index, lon_col] = hits["_latlon"].map(lambda t: t[1])
-        df.loc[hits.index, source_col] = "city_county_state"
+    co_codes, co_norm = _normalized_uniques(
+        df[county_col], lambda v: normalize_county(v).strip().lower()
+    )
+    ci_codes, ci_norm = _normalized_uniques(df[city_col], normalize_city)
+
+    # factorize() marks missing values with -1
+    mask = (st_codes >= 0) & (co_codes >= 0) & (ci_codes >= 0)
+    if not mask.any():
+        return df
+
+    # Collapse the three per-column codes into one key per row, then reduce
+    # to the distinct triples that actually occur.
+    n_co = np.int64(len(co_norm))
+    n_ci = np.int64(len(ci_norm))
+    combo = (
+        st_codes[mask].astype(np.int64) * n_co + co_codes[mask]
+    ) * n_ci + ci_codes[mask]
+    tri_codes, tri_keys = pd.factorize(combo)
+    tri_st, rest = np.divmod(tri_keys, n_co * n_ci)
+    tri_co, tri_ci = np.divmod(rest, n_ci)
+
+    table = flatten_centroids(centroids)
+    wanted = pd.MultiIndex.from_arrays(
+        [st_norm[tri_st], co_norm[tri_co], ci_norm[tri_ci]]
+    )
+    pos = table.index.get_indexer(wanted)
+
+    row_pos = pos[tri_codes]
+    hit_rows = row_pos >= 0
+    if hit_rows.any():
+        hit = np.zeros(len(df), dtype=bool)
+        hit[np.flatnonzero(mask)[hit_rows]] = True
+        src = row_pos[hit_rows]
+        df.loc[hit, lat_col] = table["lat"].to_numpy()[src]
+        df.loc[hit, lon_col] = table["lon"].to_numpy()[src]
+        df.loc[hit, source_col] = "city_county_state"
 
     return df
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+class DateIndex:
+    """
+    Date-ordered index over a frame's date column.
+
+    Date ranges resolve to row positions with ``searchsorted``. When the
+    frame is already sorted by date (``utils.schema.normalize_schema`` sorts
+    it) a range is a contiguous slice and ``select`` returns a view without
+    copying; otherwise a stable argsort is kept and rows are gathered.
+    Missing dates sort last and never match a range.
+    """
+
+    def __init__(self, dates: pd.Series) -> None:
+        values = dates.to_numpy(dtype='datetime64[ns]')
+        nat = np.isnat(values)
+        if not nat.any() and dates.is_monotonic_increasing:
+            self.order = None
+            self.sorted = values
+        else:
+            self.order = np.argsort(values, kind='stable')
+            self.sorted = values[self.order]
+        self.n_valid = len(values) - int(nat.sum())
+
+    @property
+    def min(self) -> Optional[pd.Timestamp]:
+        return pd.Timestamp(self.sorted[0]) if self.n_valid else None
+
+    @property
+    def max(self) -> Optional[pd.Timestamp]:
+        if not self.n_valid:
+            return None
+        return pd.Timestamp(self.sorted[self.n_valid - 1])
+
+    def bounds(self, start=None, end=None) -> tuple:
+        """
+        Positions (i, j) in date order of the rows with start <= date <= end.
+        Bounds are inclusive calendar dates; None leaves that side open.
+        """
+        i = 0
+        j = self.n_valid
+        if start is not None:
+            lo = np.datetime64(pd.Timestamp(start).normalize(), 'ns')
+            i = int(np.searchsorted(self.sorted[:j], lo, side='left'))
+        if end is not None:
+            hi = np.datetime64(
+                pd.Timestamp(end).normalize() + pd.Timedelta(days=1), 'ns'
+            )
+            j = int(np.searchsorted(self.sorted[:j], hi, side='left'))
+        return i, max(i, j)
+
+    def positions(self, comparisons) -> tuple:
+        """
+        Positions (i, j) in date order of the rows whose date satisfies
+        every ``(op, value)`` comparison, with ``op`` one of ``==``, ``<``,
+        ``<=``, ``>`` and ``>=`` (exact timestamps, unlike ``bounds``).
+        """
+        i = 0
+        j = self.n_valid
+        valid = self.sorted[:j]
+        for op, value in comparisons:
+            v = np.datetime64(pd.Timestamp(value), 'ns')
+            if op in ('>=', '=='):
+                i = max(i, int(np.searchsorted(valid, v, side='left')))
+            if op == '>':
+                i = max(i, int(np.searchsorted(valid, v, side='right')))
+            if op in ('<=', '=='):
+                j = min(j, int(np.searchsorted(valid, v, side='right')))
+            if op == '<':
+                j = min(j, int(np.searchsorted(valid, v, side='left')))
+        return i, max(i, j)
+
+    def take(self, df: pd.DataFrame, i: int, j: int) -> pd.DataFrame:
+        """Rows of ``df`` (the indexed frame) at date-order positions i..j."""
+        if self.order is None:
+            return df.iloc[i:j]
+        return df.take(np.sort(self.order[i:j]))
+
+    def select(self, df: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+        """Rows of ``df`` (the indexed frame) within the date range."""
+        return self.take(df, *self.bounds(start, end))
+
+    def select_years(
+        self, df: pd.DataFrame, first: int, last: Optional[int] = None
+    ) -> pd.DataFrame:
+        """Rows of ``df`` dated within the years first..last inclusive."""
+        last = first if last is None else last
+        return self.select(
+            df, pd.Timestamp(int(first), 1, 1), pd.Timestamp(int(last), 12, 31)
+        )
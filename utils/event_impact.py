@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .aggregate_cube import rollup
+
+DEFAULT_EVENTS_PATH = Path('data/processed/events.json')
+
+_REQUIRED = ('id', 'name', 'states', 'event_date')
+_DEFAULTS = {
+    'pre_months': 12,
+    'post_months': 12,
+    'color': 'red',
+    'findings': '',
+}
+
+
+def load_events(path: Path | str = DEFAULT_EVENTS_PATH) -> Dict[str, dict]:
+    """
+    Events from a JSON file of the form ``{"events": [{...}, ...]}``, keyed
+    by display name in file order.
+
+    Each event needs ``id``, ``name``, ``states`` and ``event_date``
+    ('YYYY-MM-DD'); ``label`` (defaults to ``name``), ``chart_years``
+    ([first, last], defaults to two years either side), ``pre_months``,
+    ``post_months``, ``color`` and ``findings`` are optional.
+    """
+    with Path(path).open('r', encoding='utf-8') as f:
+        raw = json.load(f)
+    events = {}
+    for item in raw.get('events', []):
+        missing = [k for k in _REQUIRED if k not in item]
+        if missing:
+            raise ValueError(f"Event {item.get('id', item)!r} is missing {missing}")
+        event = {**_DEFAULTS, **item}
+        event['event_date'] = pd.Timestamp(event['event_date'])
+        event.setdefault('label', event['name'])
+        year = event['event_date'].year
+        event['chart_years'] = tuple(event.get('chart_years') or (year - 2, year + 2))
+        events[event['name']] = event
+    return events
+
+
+def impact_summary(
+    state_month: pd.DataFrame,
+    event: dict,
+    pollutants: Sequence[str],
+) -> pd.DataFrame:
+    """
+    Pre/post window means for every pollutant, for the event's states and
+    for the rest of the US, from the cube's state x month table (see
+    ``utils.aggregate_cube``).
+
+    The pre window is the ``pre_months`` calendar months before the month
+    of ``event_date``, the post window that month and the ``post_months - 1``
+    after it. One grouped sum over (treated, window) gives all means; the
+    result is indexed by pollutant with columns ``pre``, ``post``, ``delta``,
+    ``control_pre``, ``control_post``, ``control_delta`` and ``did``
+    (difference in differences: ``delta - control_delta``).
+    """
+    event_month = event['event_date'].to_period('M').to_timestamp()
+    start = event_month - pd.DateOffset(months=event['pre_months'])
+    stop = event_month + pd.DateOffset(months=event['post_months'])
+
+    months = state_month.index.get_level_values('month')
+    in_window = (months >= start) & (months < stop)
+    rows = state_month[in_window]
+    treated = rows.index.get_level_values('State').isin(event['states'])
+    window = np.where(
+        rows.index.get_level_values('month') < event_month, 'pre', 'post'
+    )
+    cols = [(stat, m) for stat in ('sum', 'count') for m in pollutants]
+    sums = rows[cols].groupby(
+        [pd.Index(treated, name='treated'), pd.Index(window, name='window')]
+    ).sum()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums['sum'] / sums['count']
+
+    def _get(is_treated: bool, name: str) -> pd.Series:
+        key = (is_treated, name)
+        if key in means.index:
+            return means.loc[key]
+        return pd.Series(np.nan, index=list(pollutants))
+
+    out = pd.DataFrame({
+        'pre': _get(True, 'pre'),
+        'post': _get(True, 'post'),
+        'control_pre': _get(False, 'pre'),
+        'control_post': _get(False, 'post'),
+    })
+    out['delta'] = out['post'] - out['pre']
+    out['control_delta'] = out['control_post'] - out['control_pre']
+    out['did'] = out['delta'] - out['control_delta']
+    out.index.name = 'pollutant'
+    return out[['pre', 'post', 'delta', 'control_pre', 'control_post', 'control_delta', 'did']]
+
+
+def yearly_trend(
+    state_year: pd.DataFrame,
+    event: dict,
+    pollutants: Sequence[str],
+) -> pd.DataFrame:
+    """Yearly means of the event's states over ``chart_years``."""
+    first, last = event['chart_years']
+    states = state_year.index.get_level_values('State')
+    years = state_year.index.get_level_values('year')
+    sel = state_year[states.isin(event['states']) & (years >= first) & (years <= last)]
+    return rollup(sel, 'year', list(pollutants))
+
+
+def event_impact(cube: Dict[str, pd.DataFrame], event: dict) -> dict:
+    """Chart series and window statistics of one event, for all pollutants."""
+    pollutants: List[str] = list(cube['state_year']['sum'].columns)
+    return {
+        'yearly': yearly_trend(cube['state_year'], event, pollutants),
+        'summary': impact_summary(cube['state_month'], event, pollutants),
+    }
@@ -0,0 +1,206 @@
+"""
+Column- and row-subset reads of the enriched Parquet file, or of its
+year/State partitioned copy (``utils.partitioned_store``).
+
+Filters are ``(column, op, value)`` tuples, ANDed together, with ``op`` one
+of ``==``, ``!=``, ``<``, ``<=``, ``>``, ``>=``, ``in`` and ``not in``
+(``value`` is a sequence for the last two). ``read_subset`` hands them to
+pyarrow, which reads only the requested columns and skips row groups whose
+statistics rule the filter out (and, for the partitioned copy, files of
+other years and states); ``filter_frame`` applies the same selection
+to an already loaded frame, resolving date ranges with its
+``utils.date_index.DateIndex`` instead of a full scan.
+"""
+from __future__ import annotations
+
+import datetime as dt
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from .date_index import DateIndex
+from .partitioned_store import YEAR_COL, open_dataset
+from .schema import DATE_COL, normalize_schema
+
+Filter = Tuple[str, str, object]
+
+_COMPARISONS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+_SET_OPS = ('in', 'not in')
+_RANGE_OPS = ('==', '<', '<=', '>', '>=')
+
+
+def _check(filters: Iterable[Filter]) -> None:
+    for col, op, _value in filters:
+        if op not in _COMPARISONS and op not in _SET_OPS:
+            raise ValueError(f"Unsupported filter operator {op!r} for {col!r}")
+
+
+def _arrow_value(value, typ: pa.DataType):
+    # Dates are stored as 'YYYY-MM-DD' strings by utils.build_enriched;
+    # compare like with like so callers can pass dates or Timestamps
+    if pa.types.is_dictionary(typ):
+        typ = typ.value_type
+    if isinstance(value, (dt.date, pd.Timestamp)):
+        ts = pd.Timestamp(value)
+        if pa.types.is_string(typ) or pa.types.is_large_string(typ):
+            return ts.strftime('%Y-%m-%d')
+        if pa.types.is_timestamp(typ):
+            return pa.scalar(ts.to_datetime64(), type=typ)
+    return value
+
+
+def _with_year(filters: Sequence[Filter], names) -> list:
+    # Restate date bounds on the year partition key so whole years are
+    # skipped without opening their files
+    out = list(filters)
+    if YEAR_COL not in names:
+        return out
+    for col, op, value in filters:
+        if col == DATE_COL and op in ('==', '<', '<=', '>', '>='):
+            year = pd.Timestamp(value).year
+            out.append((YEAR_COL, {'<': '<=', '>': '>='}.get(op, op), year))
+    return out
+
+
+def _expression(filters: Sequence[Filter], schema: pa.Schema) -> Optional[ds.Expression]:
+    expr = None
+    for col, op, value in filters:
+        typ = schema.field(col).type
+        field = ds.field(col)
+        if op in _SET_OPS:
+            values = pa.array([_arrow_value(v, typ) for v in value])
+            term = field.isin(values)
+            if op == 'not in':
+                term = ~term
+        else:
+            term = _COMPARISONS[op](field, _arrow_value(value, typ))
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def read_subset(
+    path: Path | str,
+    columns: Sequence[str],
+    filters: Sequence[Filter] = (),
+) -> pd.DataFrame:
+    """
+    Read ``columns`` of the rows matching ``filters`` from a Parquet file or
+    partitioned directory and normalize them like the full dataset
+    (``utils.schema``). Filter columns need not be among ``columns``.
+    """
+    _check(filters)
+    dataset = open_dataset(path)
+    schema = dataset.schema
+    missing = [c for c in [*columns, *(f[0] for f in filters)]
+               if c not in schema.names]
+    if missing:
+        raise KeyError(f"Columns not in {path}: {missing}")
+    filters = _with_year(filters, schema.names)
+    table = dataset.to_table(
+        columns=list(columns), filter=_expression(filters, schema)
+    )
+    return normalize_schema(table.to_pandas())
+
+
+def _pandas_value(value, series: pd.Series):
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return pd.Timestamp(value)
+    return value
+
+
+def _date_comparisons(filters: Sequence[Filter], names) -> Tuple[list, list]:
+    # Split off the range filters on the date (or on the year, when the
+    # frame has no year column) as date comparisons
+    ranges, rest = [], []
+    for col, op, value in filters:
+        if col == DATE_COL and op in _RANGE_OPS:
+            ranges.append((op, value))
+        elif col == YEAR_COL and YEAR_COL not in names and op in _RANGE_OPS:
+            first = pd.Timestamp(int(value), 1, 1)
+            after = pd.Timestamp(int(value) + 1, 1, 1)
+            if op in ('>=', '=='):
+                ranges.append(('>=', first))
+            if op == '>':
+                ranges.append(('>=', after))
+            if op in ('<=', '=='):
+                ranges.append(('<', after))
+            if op == '<':
+                ranges.append(('<', first))
+        else:
+            rest.append((col, op, value))
+    return ranges, rest
+
+
+def filter_frame(
+    df: pd.DataFrame,
+    columns: Sequence[str],
+    filters: Sequence[Filter] = (),
+    *,
+    date_index: Optional[DateIndex] = None,
+) -> pd.DataFrame:
+    """
+    ``read_subset`` for a frame that is already in memory. With the frame's
+    ``date_index``, date and year ranges are resolved by binary search
+    (a slice when the frame is sorted by date) and only the other filters
+    are evaluated row by row, on the rows in range.
+    """
+    _check(filters)
+    if date_index is not None:
+        ranges, filters = _date_comparisons(filters, df.columns)
+        if ranges:
+            df = date_index.take(df, *date_index.positions(ranges))
+            if not filters:
+                return df[list(columns)].reset_index(drop=True)
+    mask = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        s = df[col]
+        if op in _SET_OPS:
+            term = s.isin([_pandas_value(v, s) for v in value])
+            if op == 'not in':
+                term = ~term
+        else:
+            term = _COMPARISONS[op](s, _pandas_value(value, s))
+        mask &= term
+    out = df.loc[mask, list(columns)] if filters else df[list(columns)]
+    return out.reset_index(drop=True)
+
+
+def column_names(path: Path | str) -> list:
+    return [n for n in open_dataset(path).schema.names if n != YEAR_COL]
+
+
+def _scan_min_max(dataset: ds.Dataset, column: str):
+    bounds = pc.min_max(dataset.to_table(columns=[column]).column(0))
+    return bounds['min'].as_py(), bounds['max'].as_py()
+
+
+def column_range(path: Path | str, column: str):
+    """(min, max) of a column from the row-group statistics, without reading it."""
+    dataset = open_dataset(path)
+    if column not in dataset.schema.names:
+        raise KeyError(column)
+    lo = hi = None
+    for fragment in dataset.get_fragments():
+        meta = fragment.metadata
+        index = meta.schema.to_arrow_schema().get_field_index(column)
+        if index < 0:
+            # A partition key is not stored in the files
+            return _scan_min_max(dataset, column)
+        for i in range(meta.num_row_groups):
+            stats = meta.row_group(i).column(index).statistics
+            if stats is None or not stats.has_min_max:
+                return _scan_min_max(dataset, column)
+            lo = stats.min if lo is None else min(lo, stats.min)
+            hi = stats.max if hi is None else max(hi, stats.max)
+    return lo, hi
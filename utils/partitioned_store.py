@@ -0,0 +1,112 @@
+"""
+Hive-partitioned copy of the enriched dataset, laid out as
+``<root>/year=YYYY/State=<name>/*.parquet``.
+
+``utils.build_enriched`` writes it next to ``cleaned_enriched.parquet``.
+Reads through ``open_dataset`` (see ``utils.parquet_query``) only open the
+files of the years and states a filter selects; a filter on ``Date Local``
+is also applied to ``year``, so a date window skips whole years.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from .schema import DATE_COL
+
+DEFAULT_DATASET_PATH = Path('data/cleaned_enriched')
+
+YEAR_COL = 'year'
+PARTITION_SCHEMA = pa.schema([(YEAR_COL, pa.int16()), ('State', pa.string())])
+
+# Filters on these columns let a read skip partitions
+_PRUNING_COLUMNS = (YEAR_COL, 'State', DATE_COL)
+
+
+def is_partitioned(path: Path | str) -> bool:
+    return Path(path).is_dir()
+
+
+def prunes_partitions(filters) -> bool:
+    """
+    True if ``filters`` ((column, op, value) tuples) select by year or state.
+    Without such a filter every partition file is opened, which is slower
+    than scanning the single file.
+    """
+    return any(col in _PRUNING_COLUMNS for col, _op, _value in filters)
+
+
+def open_dataset(path: Path | str) -> ds.Dataset:
+    """A pyarrow dataset over a partitioned directory or a single file."""
+    if is_partitioned(path):
+        return ds.dataset(
+            str(path),
+            format='parquet',
+            partitioning=ds.partitioning(PARTITION_SCHEMA, flavor='hive'),
+        )
+    return ds.dataset(str(path), format='parquet')
+
+
+def _year(dates: pa.ChunkedArray) -> pa.Array:
+    if pa.types.is_dictionary(dates.type):
+        dates = dates.cast(dates.type.value_type)
+    if pa.types.is_timestamp(dates.type) or pa.types.is_date(dates.type):
+        return pc.year(dates).cast(pa.int16())
+    # 'YYYY-MM-DD' strings, as written by utils.build_enriched
+    return pc.utf8_slice_codeunits(dates, 0, 4).cast(pa.int16())
+
+
+def _batches_with_year(source: ds.Dataset):
+    for batch in source.to_batches():
+        table = pa.Table.from_batches([batch])
+        yield from table.append_column(
+            YEAR_COL, _year(table.column(DATE_COL))
+        ).to_batches()
+
+
+def write_partitioned(source: Path | str, out_dir: Path | str) -> None:
+    """
+    Rewrite the single Parquet file ``source`` as a year/State partitioned
+    dataset in ``out_dir``. The new directory is built alongside and swapped
+    in at the end, so readers never see a partial dataset.
+    """
+    out = Path(out_dir)
+    tmp = out.with_name(out.name + '.tmp')
+    old = out.with_name(out.name + '.old')
+    shutil.rmtree(tmp, ignore_errors=True)
+
+    src = ds.dataset(str(source), format='parquet')
+    schema = src.schema.append(pa.field(YEAR_COL, pa.int16()))
+    try:
+        ds.write_dataset(
+            _batches_with_year(src),
+            str(tmp),
+            schema=schema,
+            format='parquet',
+            partitioning=ds.partitioning(PARTITION_SCHEMA, flavor='hive'),
+            # One file per partition (about 17 years x 54 states)
+            max_partitions=4096,
+            max_open_files=4096,
+        )
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    shutil.rmtree(old, ignore_errors=True)
+    if out.exists():
+        os.replace(out, old)
+    os.replace(tmp, out)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def read_frame(path: Path | str) -> pd.DataFrame:
+    """The whole dataset with the original columns (no ``year``)."""
+    dataset = open_dataset(path)
+    columns = [n for n in dataset.schema.names if n != YEAR_COL]
+    return dataset.to_table(columns=columns).to_pandas()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Time granularities of the time series page, as integer period codes:
+#   'year'           -> 2012
+#   'year and month' -> year * 12 + month - 1 (chronological)
+#   'month'          -> 1..12
+#   'day of year'    -> 1..366
+PERIODS = ('year', 'year and month', 'month', 'day of year')
+
+_MONTH_ABBR = (
+    'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+    'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec',
+)
+
+
+def period_codes(dates, period: str) -> np.ndarray:
+    """Integer code of each date for ``period`` (see PERIODS)."""
+    days = np.asarray(dates, dtype='datetime64[D]')
+    if period == 'year':
+        return days.astype('datetime64[Y]').astype(np.int64) + 1970
+    if period == 'year and month':
+        return days.astype('datetime64[M]').astype(np.int64) + 1970 * 12
+    if period == 'month':
+        return days.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    if period == 'day of year':
+        return (days - days.astype('datetime64[Y]')).astype(np.int64) + 1
+    raise ValueError(f"Unknown period {period!r}; expected one of {PERIODS}")
+
+
+def period_labels(codes, period: str) -> List:
+    """Display labels for period codes, e.g. 2012 * 12 + 2 -> '2012 Mar'."""
+    codes = np.asarray(codes, dtype=np.int64)
+    if period == 'year and month':
+        years, months = np.divmod(codes, 12)
+        return [f"{y} {_MONTH_ABBR[m]}" for y, m in zip(years, months)]
+    return codes.tolist()
+
+
+def grouped_mean_by_code(
+    groups: np.ndarray, codes: np.ndarray, values: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Mean of each column of ``values`` (rows x measures) per distinct
+    (group, code) pair, ignoring NaN. ``groups`` are non-negative integers
+    (e.g. from ``pd.factorize``). One bincount per measure over the combined
+    key ``group * span + (code - codes.min())``.
+
+    Returns (groups, codes, means shaped pairs x measures) for the pairs
+    that have rows, sorted by group then code; a pair whose values are all
+    NaN for a measure gets NaN.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    codes = np.asarray(codes, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    if not len(codes):
+        return groups, codes, np.empty((0, values.shape[1]))
+    lo = codes.min()
+    span = int(codes.max() - lo) + 1
+    key = groups * span + (codes - lo)
+    size = int(key.max()) + 1
+    present = np.flatnonzero(np.bincount(key, minlength=size))
+
+    means = np.empty((len(present), values.shape[1]))
+    for j in range(values.shape[1]):
+        v = values[:, j]
+        ok = ~np.isnan(v)
+        sums = np.bincount(key[ok], weights=v[ok], minlength=size)
+        counts = np.bincount(key[ok], minlength=size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means[:, j] = sums[present] / counts[present]
+    out_groups, out_codes = np.divmod(present, span)
+    return out_groups, out_codes + lo, means
+
+
+def mean_by_code(
+    codes: np.ndarray, values: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean of each column of ``values`` (rows x measures) per distinct code,
+    ignoring NaN. Returns (sorted codes, means shaped codes x measures).
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    _, out_codes, means = grouped_mean_by_code(
+        np.zeros(len(codes), dtype=np.int64), codes, values
+    )
+    return out_codes, means
+
+
+def _long(labels, measures, means, period, var_name, value_name):
+    labels = np.asarray(labels).tolist()
+    return pd.DataFrame({
+        period: labels * len(measures),
+        var_name: np.repeat(measures, len(labels)),
+        value_name: means.T.ravel(),
+    })
+
+
+def period_means(
+    dates,
+    values: pd.DataFrame,
+    period: str,
+    *,
+    var_name: str = 'variable',
+    value_name: str = 'value',
+) -> pd.DataFrame:
+    """
+    Means of each column of ``values`` per ``period`` of ``dates``, in long
+    format like ``DataFrame.melt``: columns ``[period, var_name,
+    value_name]``, chronological within each column. Labels are formatted
+    only for the aggregated points.
+    """
+    codes, means = mean_by_code(period_codes(dates, period), values.to_numpy())
+    labels = period_labels(codes, period)
+    return _long(labels, list(values.columns), means, period, var_name, value_name)
+
+
+def period_store(
+    table: pd.DataFrame,
+    *,
+    group_level: str,
+    date_level: str,
+    all_key: str = 'ALL',
+    periods: Sequence[str] = PERIODS,
+    var_name: str = 'variable',
+    value_name: str = 'value',
+) -> Dict[Tuple[str, str], pd.DataFrame]:
+    """
+    ``period_means`` for every group of ``table`` (indexed by
+    ``group_level`` and ``date_level``) and for all groups together
+    (``all_key``), for every period, keyed by (group, period).
+
+    Each period is one grouped bincount pass over all groups; labels are
+    formatted once per period.
+    """
+    group_codes, group_names = pd.factorize(
+        table.index.get_level_values(group_level), sort=True
+    )
+    dates = table.index.get_level_values(date_level)
+    values = table.to_numpy()
+    measures = list(table.columns)
+    store = {}
+    for period in periods:
+        codes = period_codes(dates, period)
+
+        all_codes, all_means = mean_by_code(codes, values)
+        all_labels = period_labels(all_codes, period)
+        store[(all_key, period)] = _long(
+            all_labels, measures, all_means, period, var_name, value_name
+        )
+
+        groups, pair_codes, means = grouped_mean_by_code(group_codes, codes, values)
+        # Every pair's code is among all_codes; reuse those labels
+        label_of = np.asarray(all_labels)[
+            np.searchsorted(all_codes, pair_codes)
+        ]
+        bounds = np.searchsorted(groups, np.arange(len(group_names) + 1))
+        for g, name in enumerate(group_names):
+            lo, hi = bounds[g], bounds[g + 1]
+            store[(name, period)] = _long(
+                label_of[lo:hi], measures, means[lo:hi], period, var_name, value_name
+            )
+    return store
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import re
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
+import numpy as np
 import pandas as pd
 
 from .city_centroids import (
+    _normalized_uniques,
     apply_city_centroids,
     load_centroids_json,
     normalize_city,
+    normalize_county,
 )
 
 
@@ -66,8 +70,54 @@ STATE_NAME_TO_FIPS: Dict[str, str] = {
     'Wyoming': '56',
 }
 
+# Census Bureau regions; states not listed (e.g. 'Country Of Mexico') map
+# to OTHER_REGION
+_CENSUS_REGIONS: Dict[str, tuple] = {
+    'Northeast': (
+        'Connecticut', 'Maine', 'Massachusetts', 'New Hampshire',
+        'New Jersey', 'New York', 'Pennsylvania', 'Rhode Island', 'Vermont',
+    ),
+    'Midwest': (
+        'Illinois', 'Indiana', 'Iowa', 'Kansas', 'Michigan', 'Minnesota',
+        'Missouri', 'Nebraska', 'North Dakota', 'Ohio', 'South Dakota',
+        'Wisconsin',
+    ),
+    'South': (
+        'Alabama', 'Arkansas', 'Delaware', 'District of Columbia', 'Florida',
+        'Georgia', 'Kentucky', 'Louisiana', 'Maryland', 'Mississippi',
+        'North Carolina', 'Oklahoma', 'South Carolina', 'Tennessee', 'Texas',
+        'Virginia', 'West Virginia',
+    ),
+    'West': (
+        'Alaska', 'Arizona', 'California', 'Colorado', 'Hawaii', 'Idaho',
+        'Montana', 'Nevada', 'New Mexico', 'Oregon', 'Utah', 'Washington',
+        'Wyoming',
+    ),
+}
+STATE_NAME_TO_REGION: Dict[str, str] = {
+    state: region
+    for region, states in _CENSUS_REGIONS.items()
+    for state in states
+}
+OTHER_REGION = 'Other'
+
+# Population columns the enrichers add, finest first; each is only present
+# when its population file was found
+POPULATION_COLUMNS = ('population_city', 'population_county', 'population_state')
+
+# The base data spells some names differently (e.g. 'District Of Columbia')
+_STATE_NAMES_FOLDED: Dict[str, str] = {
+    name.casefold(): name for name in STATE_NAME_TO_FIPS
+}
+
+
+def _state_name(value) -> Optional[str]:
+    """The STATE_NAME_TO_FIPS spelling of a state name, ignoring case."""
+    return _STATE_NAMES_FOLDED.get(str(value).strip().casefold())
+
 
-def _ensure_year(df: pd.DataFrame, date_col: str = 'Date Local') -> pd.Series:
+def _year_codes(df: pd.DataFrame, date_col: str = 'Date Local') -> np.ndarray:
+    """Year of each row as int16 (-1 where the date is missing)."""
     if date_col not in df.columns:
         msg = (
             "Missing date column '"
@@ -75,7 +125,101 @@ def _ensure_year(df: pd.DataFrame, date_col: str = 'Date Local') -> pd.Series:
             + "' to derive year for population join"
         )
         raise KeyError(msg)
-    return pd.to_datetime(df[date_col]).dt.year
+    # Parse each distinct date once
+    codes, uniques = pd.factorize(df[date_col])
+    years = np.asarray(pd.to_datetime(uniques).year, dtype=np.int16)
+    return np.append(years, np.int16(-1))[codes]
+
+
+def _fips_codes(states: pd.Series, *, by_name: bool = True) -> np.ndarray:
+    """
+    State FIPS of each row as int16 (-1 if unknown), from state names or,
+    with ``by_name=False``, from FIPS codes in any form ('6', '06', 6).
+    """
+    codes, uniques = pd.factorize(states)
+    if by_name:
+        fips = [STATE_NAME_TO_FIPS.get(_state_name(v)) for v in uniques]
+    else:
+        fips = [str(v).zfill(2) for v in uniques]
+    fips = pd.to_numeric(pd.Series(fips, dtype=object), errors='coerce')
+    fips = fips.fillna(-1).to_numpy(dtype=np.int16)
+    return np.append(fips, np.int16(-1))[codes]
+
+
+def _interpolate_years(grid: np.ndarray) -> None:
+    """Fill NaNs between two values of each row of ``grid`` linearly, in place."""
+    valid = ~np.isnan(grid)
+    col = np.arange(grid.shape[1])
+    prev = np.maximum.accumulate(np.where(valid, col, -1), axis=1)
+    nxt = np.minimum.accumulate(
+        np.where(valid, col, grid.shape[1])[:, ::-1], axis=1
+    )[:, ::-1]
+    inside = ~valid & (prev >= 0) & (nxt < grid.shape[1])
+    rows, cols = np.nonzero(inside)
+    lo, hi = prev[inside], nxt[inside]
+    grid[inside] = grid[rows, lo] + (cols - lo) / (hi - lo) * (
+        grid[rows, hi] - grid[rows, lo]
+    )
+
+
+def _dense_lookup(
+    table_keys: np.ndarray,
+    table_years: np.ndarray,
+    table_values: np.ndarray,
+    keys: np.ndarray,
+    years: np.ndarray,
+    *,
+    interpolate: bool = False,
+) -> np.ndarray:
+    """
+    ``table_values`` at each row's (key, year), NaN where there is none.
+    Keys are small non-negative integers (-1 for none); the table is laid
+    out as a dense key x year array so the lookup is a single gather. With
+    ``interpolate``, years between two years of a key are filled linearly.
+    """
+    out = np.full(len(keys), np.nan)
+    if not len(table_keys):
+        return out
+    y0 = int(table_years.min())
+    grid = np.full((int(table_keys.max()) + 1, int(table_years.max()) - y0 + 1), np.nan)
+    grid[table_keys, table_years - y0] = table_values
+    if interpolate:
+        _interpolate_years(grid)
+    ok = (
+        (keys >= 0) & (keys < grid.shape[0])
+        & (years >= y0) & (years < y0 + grid.shape[1])
+    )
+    out[ok] = grid[keys[ok], years[ok] - y0]
+    return out
+
+
+def _with_column(
+    df: pd.DataFrame, name: str, values: np.ndarray, dtype
+) -> pd.DataFrame:
+    # A new frame sharing the existing columns; like a left merge, rows are
+    # renumbered and the column keeps its integer type when every row matched
+    out = df.copy(deep=False)
+    out.index = pd.RangeIndex(len(out))
+    out[name] = values if np.isnan(values).any() else values.astype(dtype)
+    return out
+
+
+def enrich_with_region(
+    df: pd.DataFrame,
+    *,
+    state_col: str = 'State',
+    out_col: str = 'region',
+) -> pd.DataFrame:
+    """Add the Census region of each row's state (``OTHER_REGION`` if none)."""
+    codes, uniques = pd.factorize(df[state_col])
+    regions = np.array(
+        [STATE_NAME_TO_REGION.get(_state_name(v), OTHER_REGION) for v in uniques]
+        + [OTHER_REGION],
+        dtype=object,
+    )
+    dfx = df.copy(deep=False)
+    dfx[out_col] = regions[codes]
+    return dfx
 
 
 def enrich_with_centroids(
@@ -118,31 +262,24 @@ def enrich_with_state_population(
     p = Path(pop_path)
     if not p.exists():
         return df
-    year = _ensure_year(df, date_col)
-    dfx = df.copy()
-    dfx['__year'] = year
-    dfx['__state_fips'] = dfx[state_col].map(STATE_NAME_TO_FIPS)
+    years = _year_codes(df, date_col)
+    fips = _fips_codes(df[state_col])
 
     pop = pd.read_csv(p, dtype={'state_fips': str})
     # expected columns: state_fips, year, population, name
-    pop = pop.rename(columns={'population': out_col})
-    dfx = dfx.merge(
-        pop[['state_fips', 'year', out_col]],
-        how='left',
-        left_on=['__state_fips', '__year'],
-        right_on=['state_fips', 'year'],
-    )
-    # Drop only columns that exist to avoid KeyError
-    drop_cols = [c for c in ['state_fips', 'year', '__state_fips', '__year'] if c in dfx.columns]
-    if drop_cols:
-        dfx = dfx.drop(columns=drop_cols)
-    return dfx
+    values = _dense_lookup(
+        _fips_codes(pop['state_fips'], by_name=False),
+        pop['year'].to_numpy(dtype=np.int16),
+        pop['population'].to_numpy(dtype=np.float64),
+        fips,
+        years,
+    )
+    return _with_column(df, out_col, values, pop['population'].dtype)
 
 
 def _normalize_place_name(name: str) -> str:
     s = str(name).split(',')[0].strip()
     # Remove common suffixes like city, town, village, borough, CDP
-    import re
     s = re.sub(
         r"\s+(city|town|village|borough|municipality|CDP|cdp)$",
         "",
@@ -166,40 +303,129 @@ def enrich_with_city_population(
     p = Path(pop_path)
     if not p.exists():
         return df
-    year = _ensure_year(df, date_col)
-    dfx = df.copy()
-    dfx['__year'] = year
-    if state_col == 'State':
-        dfx['__state_fips'] = dfx[state_col].map(STATE_NAME_TO_FIPS).astype(str).str.zfill(2)
-    else:
-        dfx['__state_fips'] = dfx[state_col].astype(str).str.zfill(2)
-    dfx['__year'] = dfx['__year'].astype(str)
-    dfx['__city_norm'] = dfx[city_col].map(normalize_city)
+    years = _year_codes(df, date_col)
 
     pop = pd.read_csv(p, dtype={'state_fips': str})
     # expected columns: state_fips, place_fips, year, population, name
-    pop['state_fips'] = pop['state_fips'].astype(str).str.zfill(2)
-    pop['year'] = pop['year'].astype(str)
-    pop['__city_norm'] = pop['name'].map(_normalize_place_name)
+    pop['state_fips'] = _fips_codes(pop['state_fips'], by_name=False)
+    name_codes, name_norm = _normalized_uniques(pop['name'], _normalize_place_name)
+    pop['__city_norm'] = name_norm[name_codes]
 
     # Deduplicate per (state_fips, __city_norm, year); keep largest
-    pop_keys = (
+    pop = (
         pop[['state_fips', 'year', '__city_norm', 'population']]
         .sort_values(
             ['state_fips', 'year', '__city_norm', 'population'],
             ascending=[True, True, True, False],
         )
         .drop_duplicates(['state_fips', 'year', '__city_norm'], keep='first')
-        .rename(columns={'population': out_col})
     )
+    places = pd.MultiIndex.from_arrays([pop['state_fips'], pop['__city_norm']])
+    place_codes, places = pd.factorize(places)
 
-    dfx = dfx.merge(
-        pop_keys,
-        how='left',
-        left_on=['__state_fips', '__year', '__city_norm'],
-        right_on=['state_fips', 'year', '__city_norm'],
+    # Look up each distinct (state, city) pair of the rows once
+    st_codes, st_uniques = pd.factorize(df[state_col])
+    st_fips = _fips_codes(pd.Series(st_uniques), by_name=state_col == 'State')
+    ci_codes, ci_norm = _normalized_uniques(df[city_col], normalize_city)
+    mask = (st_codes >= 0) & (ci_codes >= 0)
+    n_ci = np.int64(len(ci_norm))
+    pair_codes, pair_keys = pd.factorize(
+        st_codes[mask].astype(np.int64) * n_ci + ci_codes[mask]
     )
-    dfx = dfx.drop(
-        columns=['state_fips', 'year', '__state_fips', '__year', '__city_norm']
+    pair_st, pair_ci = np.divmod(pair_keys, n_ci)
+    pair_place = places.get_indexer(
+        pd.MultiIndex.from_arrays([st_fips[pair_st], ci_norm[pair_ci]])
     )
-    return dfx
+    keys = np.full(len(df), -1, dtype=np.int64)
+    keys[mask] = pair_place[pair_codes]
+
+    values = _dense_lookup(
+        place_codes,
+        pop['year'].to_numpy(dtype=np.int16),
+        pop['population'].to_numpy(dtype=np.float64),
+        keys,
+        years,
+    )
+    return _with_column(df, out_col, values, pop['population'].dtype)
+
+
+def _normalize_county_name(name: str) -> str:
+    # 'St. Louis County, Missouri' and 'Saint Louis' -> 'st. louis'
+    s = normalize_county(str(name).split(',')[0].strip()).strip().lower()
+    return re.sub(r"^(saint|st)\.?\s+", "st. ", s)
+
+
+def enrich_with_county_population(
+    df: pd.DataFrame,
+    *,
+    pop_path: Path | str = Path(
+        'data/processed/pop_county_year_2000_2016_partial.csv'
+    ),
+    state_col: str = 'State',
+    county_col: str = 'County',
+    date_col: str = 'Date Local',
+    out_col: str = 'population_county',
+) -> pd.DataFrame:
+    """
+    County population of each row's year. County names are normalized once
+    per distinct value and resolved to (state FIPS, county FIPS), which
+    keys the lookup; years between two years of the file (2001-2009) are
+    interpolated linearly.
+    """
+    p = Path(pop_path)
+    if not p.exists():
+        return df
+    years = _year_codes(df, date_col)
+
+    pop = pd.read_csv(p, dtype={'state_fips': str, 'county_fips': str})
+    # expected columns: state_fips, county_fips, year, population, name
+    pop['state_fips'] = _fips_codes(pop['state_fips'], by_name=False)
+    pop['county_fips'] = pd.to_numeric(pop['county_fips'], errors='coerce')
+    pop = pop.dropna(subset=['county_fips'])
+    name_codes, name_norm = _normalized_uniques(pop['name'], _normalize_county_name)
+    pop['__county_norm'] = name_norm[name_codes]
+
+    # (state_fips, county_fips) is the join key; the normalized name of
+    # each county resolves the rows' county names to it
+    counties = pd.MultiIndex.from_arrays(
+        [pop['state_fips'], pop['county_fips'].astype(np.int32)]
+    )
+    county_codes, counties = pd.factorize(counties)
+    names = (
+        pd.DataFrame({
+            'state_fips': pop['state_fips'].to_numpy(),
+            '__county_norm': pop['__county_norm'].to_numpy(),
+            'county': county_codes,
+        })
+        .drop_duplicates(['state_fips', '__county_norm'], keep='first')
+    )
+    name_index = pd.MultiIndex.from_arrays(
+        [names['state_fips'], names['__county_norm']]
+    )
+
+    # Look up each distinct (state, county) pair of the rows once
+    st_codes, st_uniques = pd.factorize(df[state_col])
+    st_fips = _fips_codes(pd.Series(st_uniques), by_name=state_col == 'State')
+    co_codes, co_norm = _normalized_uniques(df[county_col], _normalize_county_name)
+    mask = (st_codes >= 0) & (co_codes >= 0)
+    n_co = np.int64(len(co_norm))
+    pair_codes, pair_keys = pd.factorize(
+        st_codes[mask].astype(np.int64) * n_co + co_codes[mask]
+    )
+    pair_st, pair_co = np.divmod(pair_keys, n_co)
+    pos = name_index.get_indexer(
+        pd.MultiIndex.from_arrays([st_fips[pair_st], co_norm[pair_co]])
+    )
+    pair_county = np.where(pos >= 0, names['county'].to_numpy()[pos], -1)
+    keys = np.full(len(df), -1, dtype=np.int64)
+    keys[mask] = pair_county[pair_codes]
+
+    values = _dense_lookup(
+        county_codes,
+        pop['year'].to_numpy(dtype=np.int16),
+        pop['population'].to_numpy(dtype=np.float64),
+        keys,
+        years,
+        interpolate=True,
+    )
+    return _with_column(df, out_col, values, pop['population'].dtype)
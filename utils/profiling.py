@@ -0,0 +1,184 @@
+"""
+Opt-in timing and memory instrumentation for the dashboard.
+
+Set ``US_POLLUTION_PROFILE`` to enable it: ``1`` logs to ``profile.jsonl``
+in the working directory, any other value is taken as the log path. Each page
+invocation (``page_run``, used by ``MultiPage.run``) appends one JSON line
+with its wall time, process RSS before/after and the named spans recorded
+inside it::
+
+    with span('data prep'):
+        ...
+    plotly_chart(fig, use_container_width=True)  # records payload bytes
+
+When profiling is off, ``span`` and ``page_run`` do nothing and
+``plotly_chart`` is ``st.plotly_chart``.
+"""
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+import psutil
+import streamlit as st
+
+ENV_VAR = 'US_POLLUTION_PROFILE'
+DEFAULT_LOG_PATH = Path('profile.jsonl')
+
+_PROCESS = psutil.Process()
+_LOG_LOCK = threading.Lock()
+# Record of the page invocation running in this thread/session, if any
+_current: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar(
+    'us_pollution_profile_page', default=None
+)
+# Last page record per session, shown in the sidebar panel
+_LAST_KEY = '_profile_last_page'
+
+
+def log_path() -> Optional[Path]:
+    """Where records are written, or None when profiling is off."""
+    value = os.environ.get(ENV_VAR, '').strip()
+    if not value or value == '0':
+        return None
+    return DEFAULT_LOG_PATH if value == '1' else Path(value)
+
+
+def enabled() -> bool:
+    return log_path() is not None
+
+
+def _rss_mb() -> float:
+    return round(_PROCESS.memory_info().rss / 2**20, 1)
+
+
+def _write(record: dict) -> None:
+    path = log_path()
+    if path is None:
+        return
+    line = json.dumps(record, default=str)
+    with _LOG_LOCK:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+@contextlib.contextmanager
+def _measure(record: dict) -> Iterator[dict]:
+    record['rss_before_mb'] = _rss_mb()
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as exc:
+        record['error'] = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        record['seconds'] = round(time.perf_counter() - start, 4)
+        record['rss_after_mb'] = _rss_mb()
+
+
+@contextlib.contextmanager
+def span(name: str, **fields) -> Iterator[dict]:
+    """
+    Time a named step. Yields a dict that the caller may add fields to (e.g.
+    row counts); it is attached to the enclosing page record, or logged on
+    its own outside a page.
+    """
+    if not enabled():
+        yield {}
+        return
+    record = {'span': name, **fields}
+    page = _current.get()
+    try:
+        with _measure(record):
+            yield record
+    finally:
+        if page is not None:
+            page['spans'].append(record)
+        else:
+            record['time'] = datetime.now(timezone.utc).isoformat()
+            _write(record)
+
+
+@contextlib.contextmanager
+def page_run(title: str) -> Iterator[None]:
+    """Record one page invocation and the spans run inside it."""
+    if not enabled():
+        yield
+        return
+    record = {
+        'time': datetime.now(timezone.utc).isoformat(),
+        'page': title,
+        'pid': os.getpid(),
+        'spans': [],
+    }
+    token = _current.set(record)
+    try:
+        with _measure(record):
+            yield
+    finally:
+        _current.reset(token)
+        _write(record)
+        st.session_state[_LAST_KEY] = record
+
+
+def log_event(name: str, **fields) -> None:
+    """Log a one-off record (e.g. startup time) outside any page."""
+    if enabled():
+        _write({
+            'time': datetime.now(timezone.utc).isoformat(),
+            'event': name,
+            'pid': os.getpid(),
+            **fields,
+        })
+
+
+def process_age_seconds() -> float:
+    """Seconds since this process was started."""
+    return round(time.time() - _PROCESS.create_time(), 3)
+
+
+def plotly_chart(fig, **kwargs):
+    """``st.plotly_chart`` that records the serialized figure size."""
+    if not enabled():
+        return st.plotly_chart(fig, **kwargs)
+    with span('plotly_chart') as record:
+        # Streamlit sends the figure as plotly JSON; measure the same payload
+        record['payload_bytes'] = len(fig.to_json())
+        return st.plotly_chart(fig, **kwargs)
+
+
+def render_panel() -> None:
+    """Sidebar summary of the last page invocation in this session."""
+    if not enabled():
+        return
+    record = st.session_state.get(_LAST_KEY)
+    if not record:
+        return
+    with st.sidebar.expander('Profiling', expanded=False):
+        st.write(
+            f"**{record['page']}**: {record['seconds']:.3f}s, "
+            f"RSS {record['rss_before_mb']:.0f} → "
+            f"{record['rss_after_mb']:.0f} MB"
+        )
+        if record['spans']:
+            st.dataframe(
+                [
+                    {
+                        'span': s['span'],
+                        'seconds': s['seconds'],
+                        'rss delta MB': round(
+                            s['rss_after_mb'] - s['rss_before_mb'], 1
+                        ),
+                        'payload bytes': s.get('payload_bytes'),
+                    }
+                    for s in record['spans']
+                ],
+                hide_index=True,
+            )
+        st.caption(f"Logged to {log_path()}")
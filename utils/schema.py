@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import logging
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bump when normalize_schema output changes so cached copies are rebuilt
+SCHEMA_VERSION = 3
+
+DATE_COL = 'Date Local'
+
+# Low-cardinality string columns stored as pandas categoricals
+LOCATION_COLUMNS = (
+    'State', 'County', 'City', 'Address', 'coord_source_city', 'region',
+)
+
+_MEASURE_SUFFIXES = (' Mean', ' 1st Max Value', ' AQI')
+_HOUR_SUFFIX = ' 1st Max Hour'
+
+
+def pollutant_measure_columns(df: pd.DataFrame) -> List[str]:
+    """Columns holding pollutant measurements (Mean, 1st Max Value, AQI)."""
+    return [c for c in df.columns if str(c).endswith(_MEASURE_SUFFIXES)]
+
+
+def hour_columns(df: pd.DataFrame) -> List[str]:
+    return [c for c in df.columns if str(c).endswith(_HOUR_SUFFIX)]
+
+
+def _to_hour(s: pd.Series) -> pd.Series:
+    # Hours are 0-23; use plain int8 unless there are gaps to represent
+    s = pd.to_numeric(s)
+    if s.isna().any():
+        return s.astype('Int8')
+    return s.astype(np.int8)
+
+
+def memory_usage_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def normalize_schema(
+    df: pd.DataFrame, *, date_col: str = DATE_COL
+) -> pd.DataFrame:
+    """
+    Return a compactly typed copy of the pollution dataset.
+
+    - date_col is parsed to datetime64 once, so pages can use ``.dt``
+      directly instead of re-parsing, and rows are stably sorted by it so
+      date ranges are contiguous slices (see ``utils.date_index``).
+    - Location columns become categoricals.
+    - Pollutant measures are downcast to float32 and the ``1st Max Hour``
+      columns to int8 (nullable Int8 when values are missing).
+
+    Logs the memory footprint before and after.
+    """
+    before = memory_usage_mb(df)
+    out = df.copy(deep=False)
+
+    if date_col in out.columns:
+        out[date_col] = pd.to_datetime(out[date_col])
+    for col in LOCATION_COLUMNS:
+        if col in out.columns:
+            out[col] = out[col].astype('category')
+    for col in pollutant_measure_columns(out):
+        out[col] = pd.to_numeric(out[col]).astype(np.float32)
+    for col in hour_columns(out):
+        out[col] = _to_hour(out[col])
+    if date_col in out.columns and not out[date_col].is_monotonic_increasing:
+        out = out.sort_values(date_col, kind='stable', ignore_index=True)
+
+    after = memory_usage_mb(out)
+    logger.info(
+        "Dataset memory: %.1f MB -> %.1f MB (%d rows, %d columns)",
+        before,
+        after,
+        len(out),
+        len(out.columns),
+    )
+    return out
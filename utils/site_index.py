@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+import pandas as pd
+
+from .population_join import POPULATION_COLUMNS
+
+# Columns identifying a monitoring site, coarsest first
+SITE_KEYS = ('State', 'County', 'City', 'Site Num', 'Address')
+
+
+def build_site_index(
+    df: pd.DataFrame,
+    *,
+    date_col: str = 'Date Local',
+    lat_col: str = 'lat_city',
+    lon_col: str = 'lon_city',
+    pop_cols: Sequence[str] = POPULATION_COLUMNS,
+) -> pd.DataFrame:
+    """
+    One row per monitoring site, keyed by whichever of SITE_KEYS are present.
+
+    Carries the site coordinates, the largest of each population recorded for it,
+    the first and last observation dates and the number of daily rows
+    (``n_obs``). Optional columns that are missing from ``df`` are left out.
+    """
+    keys = [c for c in SITE_KEYS if c in df.columns]
+    if not keys:
+        raise KeyError(f"None of the site key columns found: {SITE_KEYS}")
+
+    aggs = {}
+    if lat_col in df.columns and lon_col in df.columns:
+        aggs[lat_col] = (lat_col, 'first')
+        aggs[lon_col] = (lon_col, 'first')
+    for pop_col in pop_cols:
+        if pop_col in df.columns:
+            aggs[pop_col] = (pop_col, 'max')
+    if date_col in df.columns:
+        aggs['first_obs'] = (date_col, 'min')
+        aggs['last_obs'] = (date_col, 'max')
+    aggs['n_obs'] = (keys[0], 'size')
+
+    return (
+        df.groupby(keys, observed=True, sort=True)
+        .agg(**aggs)
+        .reset_index()
+    )
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+STATISTICS = ('mean', 'median', 'max')
+
+# (lat_min, lat_max, lon_min, lon_max)
+Bounds = Tuple[float, float, float, float]
+
+
+def _cell_index(x: np.ndarray, lo: float, hi: float, nbins: int) -> np.ndarray:
+    span = hi - lo
+    if not span > 0:
+        return np.zeros(len(x), dtype=np.int64)
+    idx = np.floor((x - lo) / span * nbins).astype(np.int64)
+    # Points on the upper edge belong to the last cell
+    return np.clip(idx, 0, nbins - 1)
+
+
+def grid_bin(
+    lat,
+    lon,
+    values,
+    nbins: int,
+    statistic: str = 'mean',
+    *,
+    bounds: Optional[Bounds] = None,
+) -> pd.DataFrame:
+    """
+    Aggregate points into an ``nbins`` x ``nbins`` lat/lon grid.
+
+    Returns one row per populated cell with the cell centre (lat, lon), the
+    aggregated ``value`` and the number of points in the cell. ``statistic``
+    is one of STATISTICS; the median is exact. Points with a missing
+    coordinate or value are ignored. ``bounds`` defaults to the extent of the
+    points.
+    """
+    if statistic not in STATISTICS:
+        raise ValueError(
+            f"Unknown statistic {statistic!r}; expected one of {STATISTICS}"
+        )
+    if nbins < 1:
+        raise ValueError("nbins must be at least 1")
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    values = np.asarray(values, dtype=float)
+    ok = np.isfinite(lat) & np.isfinite(lon) & np.isfinite(values)
+    lat, lon, values = lat[ok], lon[ok], values[ok]
+    if not len(values):
+        return pd.DataFrame(
+            {'lat': [], 'lon': [], 'value': [], 'count': []}
+        ).astype({'count': np.int64})
+
+    if bounds is None:
+        bounds = (lat.min(), lat.max(), lon.min(), lon.max())
+    lat_min, lat_max, lon_min, lon_max = bounds
+    row = _cell_index(lat, lat_min, lat_max, nbins)
+    col = _cell_index(lon, lon_min, lon_max, nbins)
+    cell = row * nbins + col
+
+    counts = np.bincount(cell, minlength=nbins * nbins)
+    cells = np.flatnonzero(counts)
+    n = counts[cells]
+
+    if statistic == 'mean':
+        sums = np.bincount(cell, weights=values, minlength=nbins * nbins)
+        value = sums[cells] / n
+    else:
+        # Sort by (cell, value); each cell is then a contiguous sorted run
+        order = np.lexsort((values, cell))
+        v = values[order]
+        start = np.concatenate(([0], np.cumsum(n)[:-1]))
+        if statistic == 'max':
+            value = v[start + n - 1]
+        else:
+            lo = v[start + (n - 1) // 2]
+            hi = v[start + n // 2]
+            value = (lo + hi) / 2
+
+    cell_h = (lat_max - lat_min) / nbins
+    cell_w = (lon_max - lon_min) / nbins
+    return pd.DataFrame({
+        'lat': lat_min + (cells // nbins + 0.5) * cell_h,
+        'lon': lon_min + (cells % nbins + 0.5) * cell_w,
+        'value': value,
+        'count': n,
+    })
@@ -0,0 +1,299 @@
+"""
+US state outlines from ``shapefiles/st99_d90_shp.zip`` (Census 1990 state
+boundaries), simplified to a few detail levels and cached as compact GeoJSON
+in ``data/geometry/``.
+
+The shapefile is read once to write every level; afterwards maps load the
+level that suits their zoom (``level_for_zoom``) from its small file. The
+GeoJSON can back a choropleth (``go.Choropleth(geojson=...)``), and maps
+drawn over ``outline_coordinates`` need neither map tiles nor Plotly's
+online basemap.
+
+Features have the state name (as spelled in the shapefile, e.g.
+'District of Columbia') as ``id`` and ``name``/``fips`` properties. Rings
+keep the shapefile's winding (exterior clockwise, holes counter-clockwise),
+which is what Plotly's geo renderer (d3-geo) expects; RFC 7946 order would
+make it fill the complement of each state.
+
+Usage::
+
+    python -m utils.state_geometry [--out data/geometry]
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import shapefile
+
+# Bump when the simplification or output format changes
+GEOMETRY_VERSION = 2
+
+DEFAULT_SHAPEFILE_PATH = Path('shapefiles/st99_d90_shp.zip')
+DEFAULT_CACHE_DIR = Path('data/geometry')
+
+# Douglas-Peucker tolerance (degrees) and coordinate decimals per level
+LEVELS: Dict[str, dict] = {
+    'low': {'tolerance': 0.05, 'decimals': 2},
+    'medium': {'tolerance': 0.01, 'decimals': 3},
+    'high': {'tolerance': 0.002, 'decimals': 4},
+}
+
+# Web-map zoom (3 shows the lower 48) from which each level is used
+_ZOOM_LEVELS = ((6.0, 'high'), (4.0, 'medium'), (0.0, 'low'))
+
+
+def level_for_zoom(zoom: float) -> str:
+    """The coarsest level that still looks smooth at a web-map zoom."""
+    for min_zoom, level in _ZOOM_LEVELS:
+        if zoom >= min_zoom:
+            return level
+    return 'low'
+
+
+def _signed_area(ring: np.ndarray) -> float:
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.sum(x[:-1] * y[1:] - x[1:] * y[:-1]))
+
+
+def _simplify(ring: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas-Peucker simplification of a closed ring."""
+    n = len(ring)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j - i < 2:
+            continue
+        start, end = ring[i], ring[j]
+        inner = ring[i + 1:j]
+        dx, dy = end - start
+        length = np.hypot(dx, dy)
+        if length == 0:
+            # First and last point of the ring coincide
+            dist = np.hypot(*(inner - start).T)
+        else:
+            dist = np.abs(dx * (inner[:, 1] - start[1]) - dy * (inner[:, 0] - start[0])) / length
+        k = int(np.argmax(dist))
+        if dist[k] > tolerance:
+            keep[i + 1 + k] = True
+            stack.append((i, i + 1 + k))
+            stack.append((i + 1 + k, j))
+    return ring[keep]
+
+
+def read_states(path: Path | str = DEFAULT_SHAPEFILE_PATH) -> Dict[str, dict]:
+    """
+    Rings of every state, keyed by name: ``{'fips': '06', 'rings': [...]}``
+    with each ring an (n, 2) lon/lat array in shapefile order (exterior
+    rings clockwise, holes counter-clockwise).
+    """
+    states: Dict[str, dict] = {}
+    with shapefile.Reader(str(path)) as reader:
+        for shape_rec in reader.iterShapeRecords():
+            rec = shape_rec.record
+            state = states.setdefault(rec['NAME'], {'fips': rec['ST'], 'rings': []})
+            shape = shape_rec.shape
+            points = np.asarray(shape.points, dtype=np.float64)
+            bounds = list(shape.parts) + [len(points)]
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                if hi - lo >= 4:
+                    state['rings'].append(points[lo:hi])
+    return states
+
+
+def _polygons(rings: List[np.ndarray], tolerance: float) -> List[List[np.ndarray]]:
+    # Exterior rings start a polygon and the holes that follow belong to
+    # it. Rings smaller than the tolerance are dropped, but every state
+    # keeps its largest ring.
+    largest = max(range(len(rings)), key=lambda i: abs(_signed_area(rings[i])))
+    polygons: List[List[np.ndarray]] = []
+    for i, ring in enumerate(rings):
+        area = _signed_area(ring)
+        simple = _simplify(ring, tolerance)
+        if i != largest and (abs(area) < tolerance ** 2 or len(simple) < 4):
+            continue
+        if len(simple) < 4:
+            simple = ring
+        if area <= 0 or not polygons:
+            # Clockwise: an exterior ring
+            polygons.append([simple])
+        else:
+            polygons[-1].append(simple)
+    return polygons
+
+
+def to_geojson(states: Dict[str, dict], level: str) -> dict:
+    """A FeatureCollection of ``states`` simplified to ``level``."""
+    params = LEVELS[level]
+    features = []
+    for name, state in states.items():
+        if not state['rings']:
+            continue
+        polygons = _polygons(state['rings'], params['tolerance'])
+        coords = [
+            [np.round(ring, params['decimals']).tolist() for ring in polygon]
+            for polygon in polygons
+        ]
+        geometry = (
+            {'type': 'Polygon', 'coordinates': coords[0]}
+            if len(coords) == 1
+            else {'type': 'MultiPolygon', 'coordinates': coords}
+        )
+        features.append({
+            'type': 'Feature',
+            'id': name,
+            'properties': {'name': name, 'fips': state['fips']},
+            'geometry': geometry,
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def _polygon_list(geometry: dict) -> list:
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    return geometry['coordinates']
+
+
+def outline_coordinates(geojson: dict) -> Tuple[list, list]:
+    """
+    (lons, lats) of every ring of ``geojson``, separated by None, for a
+    single line trace (e.g. ``go.Scattergeo(mode='lines')``).
+    """
+    lons: list = []
+    lats: list = []
+    for feature in geojson['features']:
+        for polygon in _polygon_list(feature['geometry']):
+            for ring in polygon:
+                xs, ys = zip(*ring)
+                lons.extend(xs)
+                lats.extend(ys)
+                lons.append(None)
+                lats.append(None)
+    return lons, lats
+
+
+def label_points(geojson: dict) -> Dict[str, Tuple[float, float]]:
+    """
+    (lon, lat) to label or mark each feature at, keyed by ``id``: the
+    centroid of its largest polygon's exterior ring.
+    """
+    points = {}
+    for feature in geojson['features']:
+        rings = [np.asarray(p[0], dtype=np.float64) for p in _polygon_list(feature['geometry'])]
+        areas = [_signed_area(r) for r in rings]
+        k = int(np.argmax(np.abs(areas)))
+        ring, area = rings[k], areas[k]
+        x, y = ring[:, 0], ring[:, 1]
+        cross = x[:-1] * y[1:] - x[1:] * y[:-1]
+        points[feature['id']] = (
+            float(np.sum((x[:-1] + x[1:]) * cross) / (6 * area)),
+            float(np.sum((y[:-1] + y[1:]) * cross) / (6 * area)),
+        )
+    return points
+
+
+def _dumps(geojson: dict) -> str:
+    return json.dumps(geojson, separators=(',', ':'))
+
+
+def _manifest(shapefile_path: Path) -> dict:
+    return {
+        'geometry_version': GEOMETRY_VERSION,
+        'source': str(shapefile_path),
+        'source_mtime_ns': shapefile_path.stat().st_mtime_ns,
+        'levels': LEVELS,
+    }
+
+
+def _manifest_path(cache_dir: Path) -> Path:
+    return cache_dir / 'manifest.json'
+
+
+def is_current(
+    cache_dir: Path | str = DEFAULT_CACHE_DIR,
+    shapefile_path: Path | str = DEFAULT_SHAPEFILE_PATH,
+) -> bool:
+    """True if ``cache_dir`` holds every level written from the shapefile as it is now."""
+    cache = Path(cache_dir)
+    try:
+        with _manifest_path(cache).open('r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (
+        manifest == _manifest(Path(shapefile_path))
+        and all((cache / f'states_{level}.geojson').exists() for level in LEVELS)
+    )
+
+
+def write_cache(
+    cache_dir: Path | str = DEFAULT_CACHE_DIR,
+    shapefile_path: Path | str = DEFAULT_SHAPEFILE_PATH,
+) -> Dict[str, int]:
+    """
+    Read the shapefile once and write ``states_<level>.geojson`` for every
+    level. Returns the size in bytes of each level.
+    """
+    cache = Path(cache_dir)
+    cache.mkdir(parents=True, exist_ok=True)
+    states = read_states(shapefile_path)
+    sizes = {}
+    for level in LEVELS:
+        text = _dumps(to_geojson(states, level))
+        out = cache / f'states_{level}.geojson'
+        tmp = out.with_name(f'{out.name}.{os.getpid()}.tmp')
+        tmp.write_text(text, encoding='utf-8')
+        os.replace(tmp, out)
+        sizes[level] = len(text.encode('utf-8'))
+    with _manifest_path(cache).open('w', encoding='utf-8') as f:
+        json.dump(_manifest(Path(shapefile_path)), f, indent=2)
+    return sizes
+
+
+def load_geojson(
+    level: str = 'low',
+    *,
+    cache_dir: Optional[Path | str] = DEFAULT_CACHE_DIR,
+    shapefile_path: Path | str = DEFAULT_SHAPEFILE_PATH,
+) -> dict:
+    """
+    State outlines at ``level`` from the cache, (re)writing the cache first
+    when it is missing or older than the shapefile. Falls back to
+    simplifying in memory when the cache cannot be written.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"Unknown level {level!r}; expected one of {list(LEVELS)}")
+    if cache_dir is not None:
+        cache = Path(cache_dir)
+        try:
+            if not is_current(cache, shapefile_path):
+                write_cache(cache, shapefile_path)
+            with (cache / f'states_{level}.geojson').open('r', encoding='utf-8') as f:
+                return json.load(f)
+        except OSError:
+            pass
+    return to_geojson(read_states(shapefile_path), level)
+
+
+def main(argv: Optional[list] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='python -m utils.state_geometry',
+        description='Write the simplified state GeoJSON cache.',
+    )
+    parser.add_argument('--shapefile', type=Path, default=DEFAULT_SHAPEFILE_PATH)
+    parser.add_argument('--out', type=Path, default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args(argv)
+    for level, size in write_cache(args.out, args.shapefile).items():
+        print(f"{level:<7} {LEVELS[level]['tolerance']:>6} deg {size / 1024:>8.1f} KB")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .period_rollup import grouped_mean_by_code
+from .population_join import (
+    STATE_NAME_TO_FIPS,
+    _fips_codes,
+    _interpolate_years,
+    _year_codes,
+)
+
+DEFAULT_POP_STATE_PATH = Path(
+    'data/processed/pop_state_year_2000_2016_partial.csv'
+)
+
+# Approximate land area (sq mi), public data (rounded), includes DC
+STATE_LAND_AREA_SQMI = {
+    'Alabama': 50745,
+    'Alaska': 570641,
+    'Arizona': 113594,
+    'Arkansas': 52035,
+    'California': 155779,
+    'Colorado': 103642,
+    'Connecticut': 4842,
+    'Delaware': 1949,
+    'District of Columbia': 61,
+    'Florida': 53625,
+    'Georgia': 57513,
+    'Hawaii': 6423,
+    'Idaho': 82643,
+    'Illinois': 55519,
+    'Indiana': 35826,
+    'Iowa': 55857,
+    'Kansas': 81823,
+    'Kentucky': 39486,
+    'Louisiana': 43566,
+    'Maine': 30843,
+    'Maryland': 9707,
+    'Massachusetts': 7800,
+    'Michigan': 56804,
+    'Minnesota': 79627,
+    'Mississippi': 46907,
+    'Missouri': 68742,
+    'Montana': 145546,
+    'Nebraska': 76824,
+    'Nevada': 109781,
+    'New Hampshire': 8953,
+    'New Jersey': 7354,
+    'New Mexico': 121365,
+    'New York': 47126,
+    'North Carolina': 48618,
+    'North Dakota': 69001,
+    'Ohio': 40861,
+    'Oklahoma': 68595,
+    'Oregon': 95997,
+    'Pennsylvania': 44743,
+    'Rhode Island': 1034,
+    'South Carolina': 30061,
+    'South Dakota': 75811,
+    'Tennessee': 41235,
+    'Texas': 261232,
+    'Utah': 82170,
+    'Vermont': 9217,
+    'Virginia': 39598,
+    'Washington': 66456,
+    'West Virginia': 24038,
+    'Wisconsin': 54158,
+    'Wyoming': 97093,
+}
+
+_FIPS_TO_STATE_NAME = {fips: name for name, fips in STATE_NAME_TO_FIPS.items()}
+
+
+def state_population(pop_path: Path | str = DEFAULT_POP_STATE_PATH) -> pd.DataFrame:
+    """
+    Population of every state for each year from the first to the last year
+    of the file, indexed by (State, year). Years the file skips (2001-2009)
+    are interpolated linearly and flagged in ``interpolated``.
+    """
+    pop = pd.read_csv(pop_path, dtype={'state_fips': str})
+    # expected columns: state_fips, year, population, name
+    pop['State'] = pop['state_fips'].str.zfill(2).map(_FIPS_TO_STATE_NAME)
+    pop = pop.dropna(subset=['State'])
+    grid = pop.pivot_table(index='State', columns='year', values='population', aggfunc='max')
+    years = np.arange(grid.columns.min(), grid.columns.max() + 1)
+    grid = grid.reindex(columns=years)
+    values = grid.to_numpy(dtype=np.float64)
+    known = ~np.isnan(values)
+    _interpolate_years(values)
+    out = pd.DataFrame({
+        'population': values.ravel(),
+        'interpolated': (~known & ~np.isnan(values)).ravel(),
+    }, index=pd.MultiIndex.from_product([grid.index, years], names=['State', 'year']))
+    return out.dropna(subset=['population'])
+
+
+def state_year_means(
+    df: pd.DataFrame,
+    measures: Sequence[str],
+    *,
+    state_col: str = 'State',
+    date_col: str = 'Date Local',
+) -> pd.DataFrame:
+    """
+    Mean of each of ``measures`` per (State, year), ignoring NaN, keyed by
+    the STATE_NAME_TO_FIPS spelling of the state. Rows of other states or
+    without a date are left out.
+    """
+    fips = _fips_codes(df[state_col]).astype(np.int64)
+    years = _year_codes(df, date_col).astype(np.int64)
+    keep = (fips >= 0) & (years >= 0)
+    values = np.column_stack([
+        df[m].to_numpy(dtype=np.float64, na_value=np.nan)[keep] for m in measures
+    ]) if len(measures) else np.empty((int(keep.sum()), 0))
+    out_fips, out_years, means = grouped_mean_by_code(fips[keep], years[keep], values)
+    names = [_FIPS_TO_STATE_NAME[f'{f:02d}'] for f in out_fips]
+    index = pd.MultiIndex.from_arrays([names, out_years], names=['State', 'year'])
+    return pd.DataFrame(means, index=index, columns=list(measures))
+
+
+def state_year_table(
+    population: pd.DataFrame,
+    means: pd.DataFrame,
+    areas: Mapping[str, float] = STATE_LAND_AREA_SQMI,
+) -> pd.DataFrame:
+    """
+    One row per state and year of ``population`` (see ``state_population``)
+    with ``area_sqmi``, ``density`` (people per sq mi) and the columns of
+    ``means`` (see ``state_year_means``; NaN where a state was not measured
+    that year).
+    """
+    table = population.join(means, how='left')
+    states = table.index.get_level_values('State')
+    table['area_sqmi'] = states.map(areas).astype(np.float64)
+    table['density'] = table['population'] / table['area_sqmi']
+    return table.reset_index()